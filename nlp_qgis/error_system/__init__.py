@@ -54,7 +54,8 @@ class ErrorSystem:
             parameters: Operation parameters
             result: Optional result of the operation
             save_state: Whether to save a state snapshot
-            state_data: Optional state data to save
+            state_data: Optional state data to save, or a callable returning
+                it (only called when save_state is True)
             
         Returns:
             Transaction ID
@@ -157,8 +158,7 @@ class ErrorSystem:
         except Exception as e:
             self.log_error(
                 'state_capture_error',
-                f"Failed to capture state: {str(e)}",
-                traceback.format_exc()
+                f"Failed to capture state: {str(e)}"
             )
             return None
             
@@ -192,8 +192,7 @@ class ErrorSystem:
         except Exception as e:
             self.log_error(
                 'rollback_error',
-                f"Failed to roll back: {str(e)}",
-                traceback.format_exc()
+                f"Failed to roll back: {str(e)}"
             )
             return (False, f"Error during rollback: {str(e)}")
             
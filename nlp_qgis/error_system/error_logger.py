@@ -1,6 +1,7 @@
 # error_system/error_logger.py
 import logging
 import os
+import sys
 import json
 import time
 import traceback
@@ -162,12 +163,16 @@ class StructuredErrorLogger:
             error_traceback: Optional traceback text
             context: Optional dictionary with contextual information
         """
+        # Only format the active exception when the caller didn't pass one
+        if error_traceback is None and sys.exc_info()[0] is not None:
+            error_traceback = traceback.format_exc()
+            
         # Create error record
         record = {
             'timestamp': datetime.now().isoformat(),
             'error_type': error_type,
             'error_message': error_message,
-            'traceback': error_traceback or traceback.format_exc() if traceback.format_exc() != 'NoneType: None\n' else None
+            'traceback': error_traceback
         }
         
         # Add context if provided
@@ -1,11 +1,13 @@
 # error_system/event_interceptor.py
 from qgis.PyQt.QtCore import QObject, pyqtSignal, pyqtSlot
 from qgis.gui import QgisInterface
-from qgis.core import QgsApplication
+from qgis.core import QgsApplication, QgsProject
 import time
 import json
 import os
 import logging
+from collections import deque
+from itertools import islice
 from typing import Dict, List, Any, Optional, Callable
 
 class EventInterceptor(QObject):
@@ -34,9 +36,12 @@ class EventInterceptor(QObject):
         # Initialize logger
         self.logger = logging.getLogger('NLPGISPlugin.EventInterceptor')
         
+        # QgsProject is a singleton; keep the reference instead of re-fetching it
+        self.project = QgsProject.instance()
+        
         # Event tracking
-        self.events_log = []  # Track recent events
         self.max_events = 1000  # Maximum events to keep in memory
+        self.events_log = deque(maxlen=self.max_events)  # Track recent events
         
         # Risk detection callbacks
         self.risk_detectors = {}  # Maps event types to risk detection functions
@@ -58,7 +63,7 @@ class EventInterceptor(QObject):
         layer_tree.currentLayerChanged.connect(self._on_current_layer_changed)
         
         # Intercept project events
-        project = QgsProject.instance()
+        project = self.project
         project.layersWillBeRemoved.connect(self._on_layers_will_be_removed)
         project.layersAdded.connect(self._on_layers_added)
         
@@ -120,12 +125,8 @@ class EventInterceptor(QObject):
             'data': event_data
         }
         
-        # Add to log
+        # Add to log (the deque drops the oldest event when full)
         self.events_log.append(event)
-        
-        # Trim log if needed
-        if len(self.events_log) > self.max_events:
-            self.events_log = self.events_log[-self.max_events:]
             
         # Emit signal
         self.event_captured.emit(event_type, event_data)
@@ -210,7 +211,7 @@ class EventInterceptor(QObject):
         """Handle layers will be removed event."""
         layer_details = []
         for layer_id in layer_ids:
-            layer = QgsProject.instance().mapLayer(layer_id)
+            layer = self.project.mapLayer(layer_id)
             if layer:
                 layer_details.append({
                     'layer_id': layer_id,
@@ -259,7 +260,8 @@ class EventInterceptor(QObject):
             filtered_events = [e for e in self.events_log if e['type'] == event_type]
             return filtered_events[-count:]
         else:
-            return self.events_log[-count:]
+            start = len(self.events_log) - count if count > 0 else 0
+            return list(islice(self.events_log, max(start, 0), None))
             
     def save_events_to_file(self, filename: str):
         """
@@ -269,7 +271,7 @@ class EventInterceptor(QObject):
             filename: Path to save the log
         """
         with open(filename, 'w') as f:
-            json.dump(self.events_log, f, indent=2)
+            json.dump(list(self.events_log), f, indent=2)
             
     def cleanup(self):
         """Clean up resources when the plugin is unloaded."""
@@ -284,7 +286,7 @@ class EventInterceptor(QObject):
             layer_tree = self.iface.layerTreeView()
             layer_tree.currentLayerChanged.disconnect(self._on_current_layer_changed)
             
-            project = QgsProject.instance()
+            project = self.project
             project.layersWillBeRemoved.disconnect(self._on_layers_will_be_removed)
             project.layersAdded.disconnect(self._on_layers_added)
         except:
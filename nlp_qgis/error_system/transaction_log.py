@@ -5,7 +5,7 @@ import pickle
 import time
 import hashlib
 from datetime import datetime
-from typing import Dict, List, Any, Optional, Tuple, Set
+from typing import Dict, List, Any, Optional, Tuple, Set, Union, Callable
 import logging
 
 class TransactionLogger:
@@ -128,7 +128,7 @@ class TransactionLogger:
     def log_operation(self, operation_type: str, parameters: Dict[str, Any], 
                      result: Optional[Any] = None, 
                      save_state: bool = False,
-                     state_data: Optional[Dict[str, Any]] = None) -> str:
+                     state_data: Optional[Union[Dict[str, Any], Callable[[], Dict[str, Any]]]] = None) -> str:
         """
         Log an operation in the transaction log.
         
@@ -137,7 +137,8 @@ class TransactionLogger:
             parameters: Parameters of the operation
             result: Optional result of the operation
             save_state: Whether to save a state snapshot
-            state_data: Optional state data to save (if save_state is True)
+            state_data: Optional state data to save (if save_state is True), or a
+                callable returning it so the state is only built when it is saved
             
         Returns:
             Transaction ID for the logged operation
@@ -167,6 +168,8 @@ class TransactionLogger:
                 transaction['result'] = "Result exists but is not JSON serializable"
                 
         # Save state snapshot if requested
+        if save_state and callable(state_data):
+            state_data = state_data()
         if save_state and state_data is not None:
             state_id = f"state_{transaction_id}"
             state_path = self._get_state_snapshot_path(state_id)
@@ -1,4 +1,5 @@
 # nlp_engine/__init__.py
+import importlib.util
 import os
 import logging
 import pickle
@@ -16,16 +17,12 @@ except ImportError:
     SPACY_AVAILABLE = False
     spacy = None
 
-try:
-    import torch
-    TORCH_AVAILABLE = True
-except ImportError:
-    TORCH_AVAILABLE = False
-    torch = None
+# PyTorch/transformers are only needed for training, so model_trainer is
+# imported on first use; just check that torch is installed here
+TORCH_AVAILABLE = importlib.util.find_spec('torch') is not None
 
 from .ner_model import GISNamedEntityRecognizer
 from .context_parser import GISContextParser
-from .model_trainer import GISLanguageModelTrainer
 
 class NLPEngine:
     """
@@ -53,7 +50,7 @@ class NLPEngine:
         # Initialize components with fallback mechanisms
         self.ner = None
         self.context_parser = None
-        self.model_trainer = None
+        self._model_trainer = None
         
         # Cache for frequent queries (WBSO Block 2 requirement)
         self.query_cache = {}
@@ -91,11 +88,8 @@ class NLPEngine:
             self.context_parser = GISContextParser()
             self.logger.info("GIS context parser initialized")
             
-            # Initialize model trainer if PyTorch is available
-            if self.torch_available:
-                self.model_trainer = GISLanguageModelTrainer()
-                self.logger.info("Model trainer initialized")
-            else:
+            # Model trainer is created on first use (see model_trainer)
+            if not self.torch_available:
                 self.logger.warning("PyTorch not available - model training disabled")
                 
         except Exception as e:
@@ -103,6 +97,15 @@ class NLPEngine:
             # Initialize fallback components
             self._initialize_fallback_components()
             
+    @property
+    def model_trainer(self):
+        """Model trainer, created (importing transformers) on first access."""
+        if self._model_trainer is None and self.torch_available:
+            from .model_trainer import GISLanguageModelTrainer
+            self._model_trainer = GISLanguageModelTrainer()
+            self.logger.info("Model trainer initialized")
+        return self._model_trainer
+            
     def _initialize_fallback_components(self):
         """Initialize fallback components when main NLP libraries aren't available."""
         self.logger.info("Initializing fallback NLP components")
@@ -250,17 +253,16 @@ class NLPEngine:
             }
     
     def _generate_cache_key(self, text: str, active_layers: Optional[List[str]], 
-                           current_crs: Optional[str]) -> str:
+                           current_crs: Optional[str]) -> Tuple[str, Tuple[str, ...], str]:
         """Generate a cache key for the query."""
-        # Create a normalized key
-        key_parts = [
+        # Create a normalized key; a tuple hashes without formatting a string
+        return (
             text.lower().strip(),
-            str(sorted(active_layers) if active_layers else []),
+            tuple(sorted(active_layers)) if active_layers else (),
             current_crs or ""
-        ]
-        return "|".join(key_parts)
+        )
     
-    def _cache_result(self, cache_key: str, result: Dict[str, Any]):
+    def _cache_result(self, cache_key: Tuple[str, Tuple[str, ...], str], result: Dict[str, Any]):
         """Cache a processing result."""
         # Remove from_cache flag if present
         cached_result = result.copy()
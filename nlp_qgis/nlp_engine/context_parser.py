@@ -1,10 +1,55 @@
 # nlp_engine/context_parser.py
+from types import MappingProxyType
 from typing import Dict, Any, List, Optional
 import re
 
+# Common GIS operations dictionary mapping natural language to GIS operations.
+# Built once at import time and shared (read-only) by every parser instance.
+_OPERATION_MAPPINGS = MappingProxyType({
+    # Geometric operations
+    "buffer": ("buffer", "create buffer", "make buffer", "buffering"),
+    "intersect": ("intersect", "intersection", "overlapping", "overlap", "overlaps with"),
+    "clip": ("clip", "cut", "extract", "trim"),
+    "merge": ("merge", "combine", "join", "dissolve"),
+    "union": ("union", "unite", "combine"),
+    "split": ("split", "divide", "separate"),
+    
+    # Selection operations
+    "select": ("select", "choose", "pick", "filter", "find", "get"),
+    "query": ("query", "search", "find", "where"),
+    
+    # Analysis operations  
+    "proximity": ("near", "close to", "within", "distance", "proximity"),
+    "density": ("density", "concentration", "hotspot", "cluster"),
+    "statistics": ("statistics", "calculate", "compute", "stats", "mean", "average", "sum")
+})
+
+# Common spatial relationship terms (ordered by matching priority)
+_SPATIAL_RELATIONSHIPS = (
+    "near", "close to", "far from", "adjacent to", "within", "contains",
+    "inside", "outside", "intersects", "overlaps", "crosses", "touches"
+)
+
+# One compiled alternation per operation, kept in mapping order so the
+# first matching operation wins exactly as with the nested phrase loop
+_OPERATION_PATTERNS = tuple(
+    (operation, re.compile("|".join(re.escape(phrase) for phrase in phrases)))
+    for operation, phrases in _OPERATION_MAPPINGS.items()
+)
+
+_LAYER_TOKEN_SPLIT = re.compile(r'[_\s-]')
+_DISTANCE_PATTERN = re.compile(
+    r'(\d+\.?\d*)\s*(meter|meters|m|kilometer|kilometers|km|feet|foot|ft|mile|miles|mi)',
+    re.IGNORECASE
+)
+
 class GISContextParser:
     """Context-aware parser for GIS natural language commands."""
     
+    # Shared across instances - see module-level definitions above
+    operation_mappings = _OPERATION_MAPPINGS
+    spatial_relationships = _SPATIAL_RELATIONSHIPS
+    
     def __init__(self, active_layers=None, current_crs=None):
         """Initialize the context parser.
         
@@ -15,32 +60,6 @@ class GISContextParser:
         self.active_layers = active_layers or []
         self.current_crs = current_crs
         
-        # Common GIS operations dictionary mapping natural language to GIS operations
-        self.operation_mappings = {
-            # Geometric operations
-            "buffer": ["buffer", "create buffer", "make buffer", "buffering"],
-            "intersect": ["intersect", "intersection", "overlapping", "overlap", "overlaps with"],
-            "clip": ["clip", "cut", "extract", "trim"],
-            "merge": ["merge", "combine", "join", "dissolve"],
-            "union": ["union", "unite", "combine"],
-            "split": ["split", "divide", "separate"],
-            
-            # Selection operations
-            "select": ["select", "choose", "pick", "filter", "find", "get"],
-            "query": ["query", "search", "find", "where"],
-            
-            # Analysis operations  
-            "proximity": ["near", "close to", "within", "distance", "proximity"],
-            "density": ["density", "concentration", "hotspot", "cluster"],
-            "statistics": ["statistics", "calculate", "compute", "stats", "mean", "average", "sum"]
-        }
-        
-        # Common spatial relationship terms
-        self.spatial_relationships = [
-            "near", "close to", "far from", "adjacent to", "within", "contains",
-            "inside", "outside", "intersects", "overlaps", "crosses", "touches"
-        ]
-        
     def update_context(self, active_layers: List[str], current_crs: Optional[str] = None):
         """Update the context with current GIS state.
         
@@ -63,11 +82,10 @@ class GISContextParser:
         """
         text = text.lower()
         
-        for operation, phrases in self.operation_mappings.items():
-            for phrase in phrases:
-                if phrase in text:
-                    return operation
-                    
+        for operation, pattern in _OPERATION_PATTERNS:
+            if pattern.search(text):
+                return operation
+                
         return "unknown"
     
     def identify_layers(self, text: str) -> List[str]:
@@ -90,7 +108,7 @@ class GISContextParser:
         if not identified_layers:
             for layer in self.active_layers:
                 # Create tokens from layer name (e.g., "road_network" -> ["road", "network"])
-                layer_tokens = re.split(r'[_\s-]', layer.lower())
+                layer_tokens = _LAYER_TOKEN_SPLIT.split(layer.lower())
                 
                 for token in layer_tokens:
                     if len(token) > 3 and token in text.lower():
@@ -111,8 +129,7 @@ class GISContextParser:
         parameters = {}
         
         # Match patterns like "500 meters", "2.5 km", etc.
-        distance_pattern = r'(\d+\.?\d*)\s*(meter|meters|m|kilometer|kilometers|km|feet|foot|ft|mile|miles|mi)'
-        matches = re.findall(distance_pattern, text, re.IGNORECASE)
+        matches = _DISTANCE_PATTERN.findall(text)
         
         if matches:
             value, unit = matches[0]
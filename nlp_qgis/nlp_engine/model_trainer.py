@@ -268,17 +268,22 @@ class GISLanguageModelTrainer:
             # Install packages
             packages = ['torch', 'transformers', 'datasets', 'spacy']
             
-            for package in packages:
-                self.logger.info(f"Installing {package}...")
-                result = subprocess.run([
-                    python_exe, '-m', 'pip', 'install', package
-                ], capture_output=True, text=True)
-                
-                if result.returncode != 0:
-                    self.logger.error(f"Failed to install {package}: {result.stderr}")
-                    return False
-                else:
-                    self.logger.info(f"Successfully installed {package}")
+            # Single pip invocation so dependencies are resolved only once
+            self.logger.info(f"Installing {', '.join(packages)}...")
+            result = subprocess.run([
+                python_exe, '-m', 'pip', 'install', '--disable-pip-version-check', *packages
+            ], capture_output=True, text=True)
+            
+            if result.returncode != 0:
+                # Attribute the failure to specific packages from pip's ERROR lines
+                error_lines = [line for line in (result.stdout + result.stderr).splitlines()
+                               if line.startswith('ERROR')]
+                failed = [package for package in packages
+                          if any(package in line for line in error_lines)] or packages
+                self.logger.error(f"Failed to install {', '.join(failed)}: {result.stderr}")
+                return False
+            else:
+                self.logger.info(f"Successfully installed {', '.join(packages)}")
             
             # Try to download spaCy model
             self.logger.info("Downloading spaCy model...")
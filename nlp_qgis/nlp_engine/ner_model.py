@@ -1,12 +1,35 @@
 # nlp_engine/ner_model.py
+import numpy as np
 import spacy
-from spacy.tokens import Doc, Span
+import srsly
+from spacy.attrs import DEP, HEAD, LIKE_NUM, POS
+from spacy.matcher import Matcher, PhraseMatcher
+from spacy.tokens import Doc, DocBin, Span
 from spacy.training import Example
-import torch
-from typing import List, Dict, Any, Optional, Tuple
+from spacy.symbols import NOUN, PROPN, VERB
+from spacy.util import filter_spans, minibatch
+from thinc.api import compounding
+import copy
+import functools
+import queue
+import random
+import threading
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 import os
 import json
 
+
+@functools.lru_cache(maxsize=4)
+def _load_shared_pipeline(name: str, use_gpu: bool = False) -> spacy.language.Language:
+    """Load a spaCy pipeline once per process.
+    
+    Recognizers share the returned pipeline read-only until they train.
+    ``use_gpu`` is part of the cache key because the device is fixed when
+    the pipeline is loaded.
+    """
+    return spacy.load(name)
+
+
 class GISNamedEntityRecognizer:
     """Custom Named Entity Recognition model for GIS-specific terminology."""
     
@@ -16,44 +39,266 @@ class GISNamedEntityRecognizer:
         "DISTANCE", "LOCATION", "FEATURE_TYPE", "ATTRIBUTE"
     ]
     
-    def __init__(self, model_path: Optional[str] = None):
+    # Closed GIS vocabulary matched with a PhraseMatcher rather than the
+    # statistical NER, which has no training signal for these labels
+    GIS_GAZETTEER = {
+        "GIS_TOOL": [
+            "buffer", "clip", "intersect", "intersection", "union", "merge",
+            "dissolve", "select", "filter", "query", "spatial join", "overlay", "split"
+        ],
+        "SPATIAL_RELATION": [
+            "near", "close to", "far from", "adjacent to", "within", "contains",
+            "inside", "outside", "intersects", "overlaps", "crosses", "touches"
+        ],
+        "GIS_LAYER": [
+            "roads", "rivers", "buildings", "parcels", "boundaries", "city boundaries",
+            "flood zone", "flood zones", "hospitals", "schools", "lakes", "forests"
+        ],
+        "FEATURE_TYPE": [
+            "point", "points", "line", "lines", "polygon", "polygons", "raster",
+            "highway", "residential", "commercial"
+        ],
+        "ATTRIBUTE": [
+            "area", "length", "perimeter", "population", "elevation", "height",
+            "type", "class", "category", "condition", "status"
+        ]
+    }
+    
+    # Units that turn a number into a DISTANCE entity
+    DISTANCE_UNITS = [
+        "meter", "meters", "metre", "metres", "m", "kilometer", "kilometers",
+        "kilometre", "kilometres", "km", "feet", "foot", "ft", "mile", "miles", "mi"
+    ]
+    
+    # Components not needed to extract commands (dependencies are unused and
+    # GIS entities come from the matchers unless a custom NER was loaded)
+    COMMAND_DISABLED_PIPES = ["parser", "ner"]
+    
+    # Number of distinct texts whose results are memoized per recognizer
+    RESULT_CACHE_SIZE = 1024
+    
+    # Tokenized docs buffered ahead of the model in single-process batches
+    PIPE_QUEUE_SIZE = 32
+    
+    def __init__(self, model_path: Optional[str] = None, base_model: str = "en_core_web_sm",
+                 use_gpu: bool = False, batch_size: Optional[int] = None):
         """Initialize the NER model.
         
         Args:
             model_path: Path to a pre-trained model, or None to use a base model
+            base_model: spaCy package used when no model_path is given
+                (e.g. "en_core_web_trf" for a transformer backbone)
+            use_gpu: Run inference on CUDA if available (mainly worthwhile
+                for transformer backbones)
+            batch_size: Documents per nlp.pipe batch; defaults to the
+                GIS_SPACY_BATCH_SIZE environment variable
         """
-        # Initialize with base model if no specific model is provided
-        if model_path and os.path.exists(model_path):
-            self.nlp = spacy.load(model_path)
+        # GPU allocation must be selected before any pipeline is loaded
+        self.use_gpu = bool(use_gpu and spacy.prefer_gpu())
+        if use_gpu and not self.use_gpu:
+            print("GPU requested but not available - running spaCy on CPU")
+        
+        # Initialize with base model if no specific model is provided. The
+        # loaded pipeline is shared with other recognizers until train()
+        self.custom_model = bool(model_path and os.path.exists(model_path))
+        self._model_source = model_path if self.custom_model else base_model
+        self._owns_pipeline = False
+        self.nlp = _load_shared_pipeline(self._model_source, self.use_gpu)
+        if self.custom_model:
             print(f"Loaded custom GIS NER model from {model_path}")
         else:
             # Start with a base model and customize
-            self.nlp = spacy.load("en_core_web_sm")
             print("Using base spaCy model with GIS customizations")
+            self._add_gis_labels()
+        
+        self._build_matchers()
+        
+        # A custom model carries a trained NER, so keep it for command extraction
+        disabled = [pipe for pipe in self.COMMAND_DISABLED_PIPES
+                    if not (pipe == "ner" and self.custom_model)]
+        self._command_disabled_pipes = [pipe for pipe in disabled if pipe in self.nlp.pipe_names]
+        self._freeze_pipelines()
+        
+        # Batch settings for annotate_texts/extract_gis_commands_batch. Keep
+        # GIS_SPACY_N_PROCESS at 1 inside QGIS: worker processes are spawned
+        # from the QGIS executable, which is only safe in standalone scripts.
+        self.batch_size = batch_size or int(os.environ.get("GIS_SPACY_BATCH_SIZE", "64"))
+        self.n_process = int(os.environ.get("GIS_SPACY_N_PROCESS", "1"))
+        
+        # Per-instance memoization of derived results (not Docs) keyed on text
+        self._annotation_cache = functools.lru_cache(maxsize=self.RESULT_CACHE_SIZE)(
+            self._annotate_uncached
+        )
+        self._command_cache = functools.lru_cache(maxsize=self.RESULT_CACHE_SIZE)(
+            self._extract_uncached
+        )
+    
+    def _add_gis_labels(self):
+        """Add the GIS entity labels to the NER pipe (idempotent)."""
+        # Add custom entity types to the NER pipe
+        if "ner" not in self.nlp.pipe_names:
+            ner = self.nlp.add_pipe("ner")
+        else:
+            ner = self.nlp.get_pipe("ner")
             
-            # Add custom entity types to the NER pipe
-            if "ner" not in self.nlp.pipe_names:
-                ner = self.nlp.add_pipe("ner")
+        # Add GIS-specific entity labels
+        for entity_type in self.GIS_ENTITY_TYPES:
+            ner.add_label(entity_type)
+    
+    def _detach_pipeline(self):
+        """Swap the shared pipeline for a private copy before mutating weights."""
+        if self._owns_pipeline:
+            return
+        
+        self.nlp = spacy.load(self._model_source)
+        if not self.custom_model:
+            self._add_gis_labels()
+        self._owns_pipeline = True
+        
+        # Matchers and frozen plans are bound to the old pipeline/vocab
+        self._build_matchers()
+        self._freeze_pipelines()
+    
+    def clear_cache(self):
+        """Drop memoized results, e.g. after the model has changed."""
+        self._annotation_cache.cache_clear()
+        self._command_cache.cache_clear()
+    
+    def _freeze_pipelines(self):
+        """Resolve the component sequences used for single-text inference.
+        
+        Components are looked up once here and called directly on the Doc,
+        skipping the per-call disable filtering of ``Language.__call__``.
+        """
+        self._annotation_plan = [proc for _, proc in self.nlp.pipeline]
+        self._command_plan = [proc for name, proc in self.nlp.pipeline
+                              if name not in self._command_disabled_pipes]
+    
+    def _run_plan(self, doc: Doc, plan: List[Any]) -> Doc:
+        """Apply a frozen component sequence to a tokenized doc."""
+        for proc in plan:
+            doc = proc(doc)
+        return doc
+    
+    def _pipe_plan(self, texts: Iterable[str], plan: List[Any], disable: List[str]) -> Iterator[Doc]:
+        """Stream texts through a component sequence in batches.
+        
+        With a single process, tokenization runs on a producer thread that
+        fills a bounded queue while the components consume it, so the two
+        stages overlap (spaCy releases the GIL in its Cython code).
+        Multi-process runs are delegated to ``nlp.pipe``.
+        """
+        if self.n_process != 1:
+            yield from self.nlp.pipe(texts, batch_size=self.batch_size,
+                                     n_process=self.n_process, disable=disable)
+            return
+        
+        docs_queue = queue.Queue(maxsize=self.PIPE_QUEUE_SIZE)
+        stopped = threading.Event()
+        done = object()
+        
+        def put(item):
+            # Give up once the consumer has gone away instead of blocking forever
+            while not stopped.is_set():
+                try:
+                    docs_queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def produce():
+            try:
+                for doc in self.nlp.tokenizer.pipe(texts, batch_size=self.batch_size):
+                    if not put(doc):
+                        return
+            except Exception as e:
+                put(e)
+            put(done)
+        
+        def consume():
+            while True:
+                item = docs_queue.get()
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        
+        docs = consume()
+        for proc in plan:
+            if hasattr(proc, "pipe"):
+                docs = proc.pipe(docs, batch_size=self.batch_size)
             else:
-                ner = self.nlp.get_pipe("ner")
-                
-            # Add GIS-specific entity labels
-            for entity_type in self.GIS_ENTITY_TYPES:
-                ner.add_label(entity_type)
+                docs = map(proc, docs)
+        
+        try:
+            yield from docs
+        finally:
+            stopped.set()
     
-    def train(self, training_data: List[Tuple[str, Dict[str, Any]]], epochs: int = 30):
+    def _build_matchers(self):
+        """Compile the GIS gazetteer and distance patterns against the vocab."""
+        self.phrase_matcher = PhraseMatcher(self.nlp.vocab, attr="LOWER")
+        for label, terms in self.GIS_GAZETTEER.items():
+            self.phrase_matcher.add(label, [self.nlp.make_doc(term) for term in terms])
+        
+        # Integer label IDs so hot loops compare ent.label instead of ent.label_
+        strings = self.nlp.vocab.strings
+        self._L_CARDINAL = strings.add("CARDINAL")
+        self._L_QUANTITY = strings.add("QUANTITY")
+        self._L_DISTANCE = strings.add("DISTANCE")
+        self._L_GIS_LAYER = strings.add("GIS_LAYER")
+        self._L_GIS_TOOL = strings.add("GIS_TOOL")
+        self._L_SPATIAL_RELATION = strings.add("SPATIAL_RELATION")
+        
+        self.distance_matcher = Matcher(self.nlp.vocab)
+        self.distance_matcher.add("DISTANCE", [[
+            {"LIKE_NUM": True},
+            {"LOWER": {"IN": self.DISTANCE_UNITS}}
+        ]])
+    
+    def _match_gis_entities(self, doc: Doc, extra_spans: Optional[List[Span]] = None) -> List[Span]:
+        """Find GIS entities in a doc using the rule-based matchers.
+        
+        Args:
+            doc: Tokenized document
+            extra_spans: Additional spans (e.g. statistical entities) to merge
+            
+        Returns:
+            Non-overlapping entity spans in document order, longest match wins
+        """
+        spans = list(extra_spans or [])
+        spans.extend(self.phrase_matcher(doc, as_spans=True))
+        spans.extend(self.distance_matcher(doc, as_spans=True))
+        return filter_spans(spans)
+    
+    def train(self, training_data: List[Tuple[str, Dict[str, Any]]], epochs: int = 30,
+              docs_cache_path: Optional[str] = None):
         """Fine-tune the NER model with GIS-specific training data.
         
         Args:
             training_data: List of (text, annotations) pairs
             epochs: Number of training iterations
+            docs_cache_path: Optional ``.spacy`` file caching the tokenized
+                training docs between runs
         """
+        # Never train the pipeline shared with other recognizers
+        self._detach_pipeline()
+        
+        # Results from the previous weights are no longer valid
+        self.clear_cache()
+        
         # Convert training data to spaCy format
-        examples = []
-        for text, annotations in training_data:
-            doc = self.nlp.make_doc(text)
-            example = Example.from_dict(doc, annotations)
-            examples.append(example)
+        texts = [text for text, _ in training_data]
+        docs = self._load_training_docs(texts, docs_cache_path)
+        examples = [
+            Example.from_dict(doc, annotations)
+            for doc, (_, annotations) in zip(docs, training_data)
+        ]
         
         # Only train the NER component
         ner = self.nlp.get_pipe("ner")
@@ -65,18 +310,49 @@ class GISNamedEntityRecognizer:
         other_pipes = [pipe for pipe in self.nlp.pipe_names if pipe != "ner"]
         
         with self.nlp.disable_pipes(*other_pipes):
+            # Runs on GPU when the recognizer was created with use_gpu
             optimizer = self.nlp.create_optimizer()
             
-            print("Training GIS-specific NER model...")
+            print(f"Training GIS-specific NER model ({'GPU' if self.use_gpu else 'CPU'})...")
             for epoch in range(epochs):
                 losses = {}
-                batches = spacy.util.minibatch(examples, size=8)
+                
+                # Reshuffle each epoch and grow batches from 4 to 32 examples
+                random.shuffle(examples)
+                batches = minibatch(examples, size=compounding(4.0, 32.0, 1.001))
                 
                 for batch in batches:
                     self.nlp.update(batch, drop=dropout, losses=losses, sgd=optimizer)
                 
                 print(f"Epoch {epoch+1}/{epochs}, Loss: {losses['ner']:.4f}")
     
+    def _load_training_docs(self, texts: List[str], docs_cache_path: Optional[str] = None) -> List[Doc]:
+        """Tokenize training texts, reusing a DocBin cache on disk if valid.
+        
+        Args:
+            texts: Training texts
+            docs_cache_path: Optional DocBin file to read from / write to
+            
+        Returns:
+            Tokenized docs in the same order as texts
+        """
+        if docs_cache_path and os.path.exists(docs_cache_path):
+            try:
+                cached = list(DocBin().from_disk(docs_cache_path).get_docs(self.nlp.vocab))
+                # Only reuse the cache if it was built from the same texts
+                if [doc.text for doc in cached] == texts:
+                    return cached
+            except Exception as e:
+                print(f"Ignoring unreadable training docs cache {docs_cache_path}: {e}")
+        
+        # Tokenize all texts in one streamed tokenizer.pipe call
+        docs = list(self.nlp.tokenizer.pipe(texts, batch_size=self.batch_size))
+        
+        if docs_cache_path:
+            DocBin(docs=docs).to_disk(docs_cache_path)
+            
+        return docs
+    
     def save(self, output_path: str):
         """Save the trained model to disk.
         
@@ -89,19 +365,75 @@ class GISNamedEntityRecognizer:
         self.nlp.to_disk(output_path)
         print(f"Model saved to {output_path}")
     
-    def annotate_text(self, text: str) -> Dict[str, Any]:
+    def annotate_text(self, text: str, as_arrays: bool = False) -> Dict[str, Any]:
         """Process text and extract GIS-specific entities.
         
         Args:
             text: Input text containing GIS commands or queries
+            as_arrays: Return token attributes as NumPy arrays of StringStore
+                IDs (see _doc_to_arrays) instead of lists of strings
             
         Returns:
             Dictionary containing recognized entities and their types
         """
-        doc = self.nlp(text)
+        # Copy so callers can't mutate the memoized result
+        return copy.deepcopy(self._annotation_cache(text, as_arrays))
+    
+    def annotate_texts(self, texts: Iterable[str], as_arrays: bool = False) -> Iterator[Dict[str, Any]]:
+        """Annotate many texts in batches.
+        
+        Batch size and worker count come from the ``GIS_SPACY_BATCH_SIZE``
+        (default 64) and ``GIS_SPACY_N_PROCESS`` (default 1) environment
+        variables.
+        
+        Args:
+            texts: Input texts
+            as_arrays: Return token attributes as NumPy arrays
+            
+        Yields:
+            One annotation dictionary per text, as returned by annotate_text
+        """
+        to_result = self._doc_to_arrays if as_arrays else self._doc_to_annotation
+        for doc in self._pipe_plan(texts, self._annotation_plan, []):
+            yield to_result(doc)
+    
+    def _annotate_uncached(self, text: str, as_arrays: bool = False) -> Dict[str, Any]:
+        """Run the full pipeline on text and build its annotation."""
+        doc = self._run_plan(self.nlp.make_doc(text), self._annotation_plan)
+        return self._doc_to_arrays(doc) if as_arrays else self._doc_to_annotation(doc)
+    
+    def annotate_entities_packed(self, text: str) -> bytes:
+        """Recognize entities and return them msgpack-encoded for IPC.
         
+        Entities are packed as ``(text, start, end, type)`` tuples rather
+        than per-entity dicts; decode them with unpack_entities.
+        
+        Args:
+            text: Input text containing GIS commands or queries
+            
+        Returns:
+            msgpack bytes
+        """
+        doc = self._run_plan(self.nlp.make_doc(text), self._annotation_plan)
+        return srsly.msgpack_dumps([
+            (ent.text, ent.start_char, ent.end_char, ent.label_)
+            for ent in self._match_gis_entities(doc, doc.ents)
+        ])
+    
+    @staticmethod
+    def unpack_entities(data: bytes) -> List[Tuple[str, int, int, str]]:
+        """Decode entities produced by annotate_entities_packed."""
+        return [tuple(entity) for entity in srsly.msgpack_loads(data)]
+    
+    def label_strings(self, ids: Iterable[int]) -> List[str]:
+        """Resolve StringStore IDs (e.g. ``pos_ids``/``dep_ids``) to labels."""
+        strings = self.nlp.vocab.strings
+        return [strings[int(label_id)] for label_id in ids]
+    
+    def _doc_to_annotation(self, doc: Doc) -> Dict[str, Any]:
+        """Build the annotate_text result for a processed doc."""
         entities = []
-        for ent in doc.ents:
+        for ent in self._match_gis_entities(doc, doc.ents):
             entities.append({
                 "text": ent.text,
                 "start": ent.start_char,
@@ -109,16 +441,59 @@ class GISNamedEntityRecognizer:
                 "type": ent.label_
             })
         
-        # Extract additional GIS-relevant information
+        # Extract additional GIS-relevant information in a single token pass;
+        # dependency triples come from the DEP/HEAD arrays rather than
+        # creating a head Token object per token
+        tokens = []
+        pos_tags = []
+        for token in doc:
+            tokens.append(token.text)
+            pos_tags.append(token.pos_)
+        
+        # DEP stays uint64 (hashes can exceed the int64 range); only the
+        # HEAD offsets are signed
+        attrs = doc.to_array([DEP, HEAD])
+        heads = np.arange(len(doc), dtype=np.int64) + attrs[:, 1].astype(np.int64)
+        
         result = {
             "entities": entities,
-            "tokens": [token.text for token in doc],
-            "pos_tags": [token.pos_ for token in doc],
-            "dependencies": [(token.text, token.dep_, token.head.text) for token in doc]
+            "tokens": tokens,
+            "pos_tags": pos_tags,
+            "dependencies": self._dependency_triples(tokens, attrs[:, 0], heads)
         }
         
         return result
     
+    def _doc_to_arrays(self, doc: Doc) -> Dict[str, Any]:
+        """Build a struct-of-arrays annotation for a processed doc.
+        
+        Token attributes stay as integer IDs (resolve them with
+        label_strings) and ``heads`` holds absolute token indices, which is
+        far cheaper to build and serialize than per-token Python tuples.
+        """
+        # POS/DEP stay uint64 StringStore IDs; only HEAD offsets are signed
+        attrs = doc.to_array([POS, DEP, HEAD])
+        return {
+            "entities": [
+                {"text": ent.text, "start": ent.start_char, "end": ent.end_char, "type": ent.label_}
+                for ent in self._match_gis_entities(doc, doc.ents)
+            ],
+            "tokens": np.array([token.text for token in doc], dtype=object),
+            "pos_ids": attrs[:, 0],
+            "dep_ids": attrs[:, 1],
+            # to_array stores heads as offsets relative to each token
+            "heads": np.arange(len(doc), dtype=np.int64) + attrs[:, 2].astype(np.int64)
+        }
+    
+    def dependency_triples(self, annotation: Dict[str, Any]) -> List[Tuple[str, str, str]]:
+        """Materialize ``(token, dep, head)`` triples from an as_arrays annotation."""
+        return self._dependency_triples(annotation["tokens"], annotation["dep_ids"], annotation["heads"])
+    
+    def _dependency_triples(self, tokens, dep_ids, heads) -> List[Tuple[str, str, str]]:
+        """Build dependency triples from token texts, DEP IDs and head indices."""
+        dep_labels = self.label_strings(dep_ids)
+        return [(tokens[i], dep_labels[i], tokens[int(heads[i])]) for i in range(len(tokens))]
+    
     def extract_gis_commands(self, text: str) -> Dict[str, Any]:
         """Extracts GIS operations, parameters, and targets from text.
         
@@ -128,10 +503,38 @@ class GISNamedEntityRecognizer:
         Returns:
             Structured representation of the GIS command
         """
-        doc = self.nlp(text)
+        # Copy so callers can't mutate the memoized result
+        return copy.deepcopy(self._command_cache(text))
+    
+    def extract_gis_commands_batch(self, texts: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """Extract GIS commands from many texts in batches.
         
-        # Initialize extraction results
-        result = {
+        Args:
+            texts: Natural language GIS commands
+            
+        Yields:
+            One command structure per text, as returned by extract_gis_commands
+        """
+        for doc in self._pipe_plan(texts, self._command_plan, self._command_disabled_pipes):
+            yield self._doc_to_command(doc)
+    
+    def _extract_uncached(self, text: str) -> Dict[str, Any]:
+        """Run the reduced command pipeline on text and build its command."""
+        doc = self.nlp.make_doc(text)
+        
+        if not self.custom_model:
+            # Gazetteer fast path: tokenizer and matchers only, no tagger
+            result = self._gazetteer_command(doc)
+            if result is not None:
+                return result
+        
+        # Parser and (untrained) NER are skipped; GIS entities come from the
+        # matchers. The already tokenized doc is reused.
+        return self._doc_to_command(self._run_plan(doc, self._command_plan))
+    
+    def _new_command_result(self) -> Dict[str, Any]:
+        """Create an empty extract_gis_commands result."""
+        return {
             "action": None,          # The GIS operation (buffer, clip, etc.)
             "primary_target": None,  # The main layer or data to operate on
             "parameters": {},        # Operation parameters (distance, etc.)
@@ -139,31 +542,79 @@ class GISNamedEntityRecognizer:
             "spatial_modifiers": [], # Spatial relationships (near, intersects)
             "confidence": 0.0,       # Confidence in the extraction
         }
+    
+    def _gazetteer_command(self, doc: Doc) -> Optional[Dict[str, Any]]:
+        """Resolve a command from the rule-based matchers alone.
         
-        # Extract action verbs (potential GIS operations)
-        action_verbs = [token.lemma_ for token in doc if token.pos_ == "VERB"]
+        Args:
+            doc: Tokenized (not tagged) document
+            
+        Returns:
+            The command, or None if the gazetteer doesn't yield both an
+            action and a target and the statistical pipeline is needed
+        """
+        result = self._new_command_result()
+        self._apply_gis_entities(result, self._match_gis_entities(doc))
         
-        # Extract potential targets (nouns that might be layers)
-        potential_targets = [token.text for token in doc if token.pos_ in ["NOUN", "PROPN"]]
+        if not (result["action"] and result["primary_target"]):
+            return None
         
-        # Look for entities that might be parameters
-        for ent in doc.ents:
-            if ent.label_ == "CARDINAL" or ent.label_ == "QUANTITY":
+        if "distance" not in result["parameters"]:
+            for token in doc:
+                if token.like_num:
+                    result["parameters"]["distance"] = token.text
+                    break
+        
+        result["confidence"] = 0.7
+        return result
+    
+    def _apply_gis_entities(self, result: Dict[str, Any], entities: List[Span]):
+        """Fill command fields from recognized entity spans."""
+        for ent in entities:
+            label = ent.label
+            if label == self._L_CARDINAL or label == self._L_QUANTITY:
                 # Could be a distance parameter
                 result["parameters"]["distance"] = ent.text
-            elif ent.label_ == "DISTANCE":
+            elif label == self._L_DISTANCE:
                 result["parameters"]["distance"] = ent.text
-            elif ent.label_ == "GIS_LAYER":
+            elif label == self._L_GIS_LAYER:
                 # Could be a target layer
                 if not result["primary_target"]:
                     result["primary_target"] = ent.text
+            elif label == self._L_GIS_TOOL:
+                # Gazetteer hit is a stronger action signal than the first verb
+                if not result["action"]:
+                    result["action"] = ent.text.lower()
+            elif label == self._L_SPATIAL_RELATION:
+                result["spatial_modifiers"].append(ent.text.lower())
+    
+    def _doc_to_command(self, doc: Doc) -> Dict[str, Any]:
+        """Build the extract_gis_commands result for a processed doc."""
+        # Initialize extraction results
+        result = self._new_command_result()
+        
+        # Bulk-read POS and LIKE_NUM instead of filtering tokens in Python; only
+        # the first verb (potential GIS operation), noun/proper noun
+        # (potential layer) and number are ever used
+        attrs = doc.to_array([POS, LIKE_NUM])
+        pos = attrs[:, 0]
+        verb_idx = np.flatnonzero(pos == VERB)
+        target_idx = np.flatnonzero(np.isin(pos, (NOUN, PROPN)))
+        number_idx = np.flatnonzero(attrs[:, 1])
+        
+        # Look for entities that might be parameters
+        self._apply_gis_entities(result, self._match_gis_entities(doc, doc.ents))
+        
+        # Without the statistical NER a bare number is still a distance candidate
+        if number_idx.size and "distance" not in result["parameters"]:
+            result["parameters"]["distance"] = doc[int(number_idx[0])].text
             
         # Simple heuristic assignment if we detected entities
-        if action_verbs and not result["action"]:
-            result["action"] = action_verbs[0]
+        if verb_idx.size and not result["action"]:
+            result["action"] = doc[int(verb_idx[0])].lemma_
             
-        if potential_targets and not result["primary_target"]:
-            result["primary_target"] = potential_targets[0]
+        if target_idx.size and not result["primary_target"]:
+            result["primary_target"] = doc[int(target_idx[0])].text
         
         # Set a base confidence - this would be refined in a real implementation
         result["confidence"] = 0.7 if result["action"] and result["primary_target"] else 0.3
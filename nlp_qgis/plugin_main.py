@@ -16,90 +16,168 @@ except:
     pass
 
 # Now proceed with normal imports
-from qgis.PyQt.QtCore import QSettings, QTranslator, QCoreApplication, Qt, QTimer, QThread, pyqtSignal
+from qgis.PyQt.QtCore import QSettings, QTranslator, QCoreApplication, Qt, QTimer
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtWidgets import (QAction, QDockWidget, QVBoxLayout, QWidget, QTextEdit, 
                                 QPushButton, QLineEdit, QProgressBar, QLabel, QMessageBox, 
                                 QHBoxLayout, QComboBox, QCheckBox, QTabWidget, QListWidget,
                                 QSplitter, QGroupBox, QSpinBox)
-from qgis.core import QgsProject, Qgis, QgsMessageLog
+from qgis.core import QgsProject, Qgis, QgsMessageLog, QgsApplication, QgsTask
 
+import functools
+import importlib
+import importlib.util
+import itertools
 import traceback
 import time
 import json
 import threading
-from concurrent.futures import ThreadPoolExecutor
+from collections import deque
 from typing import Dict, Any, Optional, List
 
-# Import our components with better error handling
-try:
-    from .nlp_engine import NLPEngine
-    NLP_ENGINE_AVAILABLE = True
-except ImportError as e:
-    NLP_ENGINE_AVAILABLE = False
-    NLP_ENGINE_ERROR = str(e)
-
-try:
-    from .qgis_integration import QGISIntegration
-    QGIS_INTEGRATION_AVAILABLE = True
-except ImportError as e:
-    QGIS_INTEGRATION_AVAILABLE = False
-    QGIS_INTEGRATION_ERROR = str(e)
+# Plugin components are imported lazily by _init_components so that QGIS
+# startup doesn't pull in torch/transformers/spaCy. Availability is None
+# until a component's import has been attempted.
+_COMPONENT_MODULES = {
+    'nlp_engine': ('nlp_engine', 'NLPEngine', 'NLP Engine'),
+    'qgis_integration': ('qgis_integration', 'QGISIntegration', 'QGIS Integration'),
+    'error_system': ('error_system', 'ErrorSystem', 'Error System'),
+    'query_engine': ('query_engine', 'QueryEngine', 'Query Engine'),
+    'testing_framework': ('testing', 'TestingFramework', 'Testing Framework'),
+}
+_AVAILABILITY = {component: None for component in _COMPONENT_MODULES}
+_IMPORT_ERRORS = {}
+_MODULES = {}
 
-try:
-    from .error_system import ErrorSystem
-    ERROR_SYSTEM_AVAILABLE = True
-except ImportError as e:
-    ERROR_SYSTEM_AVAILABLE = False
-    ERROR_SYSTEM_ERROR = str(e)
+def _lazy_import(component: str):
+    """Import a component's subpackage on first use.
+    
+    Args:
+        component: Key in _COMPONENT_MODULES
+        
+    Returns:
+        The component's main class, or None if its import failed
+    """
+    module_name, class_name, _ = _COMPONENT_MODULES[component]
+    if component not in _MODULES:
+        try:
+            _MODULES[component] = importlib.import_module(f".{module_name}", __package__)
+            _AVAILABILITY[component] = True
+        except ImportError as e:
+            _MODULES[component] = None
+            _AVAILABILITY[component] = False
+            _IMPORT_ERRORS[component] = str(e)
+    
+    module = _MODULES[component]
+    return getattr(module, class_name) if module else None
 
-try:
-    from .query_engine import QueryEngine
-    QUERY_ENGINE_AVAILABLE = True
-except ImportError as e:
-    QUERY_ENGINE_AVAILABLE = False
-    QUERY_ENGINE_ERROR = str(e)
+_SNAPSHOT_SCALARS = (str, int, float, bool, type(None))
 
-try:
-    from .testing import TestingFramework
-    TESTING_FRAMEWORK_AVAILABLE = True
-except ImportError as e:
-    TESTING_FRAMEWORK_AVAILABLE = False
-    TESTING_FRAMEWORK_ERROR = str(e)
+def _snapshot_context(value):
+    """Copy a context structure down to plain Python data.
+    
+    The copy is handed to a background task, so any live QGIS object
+    (layer, CRS, extent, ...) is replaced by its id, auth id or string form.
+    
+    Args:
+        value: Context dict (or nested value) from get_current_context
+        
+    Returns:
+        Snapshot containing only dicts, lists and scalars
+    """
+    if isinstance(value, _SNAPSHOT_SCALARS):
+        return value
+    if isinstance(value, dict):
+        return {key: _snapshot_context(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_snapshot_context(item) for item in value]
+    if hasattr(value, 'authid'):
+        return value.authid()
+    if hasattr(value, 'id'):
+        return value.id()
+    if hasattr(value, 'toString'):
+        return value.toString()
+    return str(value)
 
-class NLPProcessingThread(QThread):
-    """Separate thread for NLP processing to avoid blocking UI."""
+@functools.lru_cache(maxsize=8)
+def _component_details_text(availability: tuple) -> str:
+    """Build the component details text for an availability snapshot.
     
-    processing_finished = pyqtSignal(str, dict)
-    processing_failed = pyqtSignal(str, str)
-    progress_updated = pyqtSignal(int, str)
+    Availability only changes when components are first imported, so the
+    text is built once per state instead of on every status refresh.
     
-    def __init__(self, query_engine, command_text, context):
-        super().__init__()
-        self.query_engine = query_engine
-        self.command_text = command_text
-        self.context = context
+    Args:
+        availability: tuple(_AVAILABILITY.values())
         
-    def run(self):
-        """Run NLP processing in separate thread."""
-        try:
-            self.progress_updated.emit(10, "Initializing NLP processing...")
-            
-            if not self.query_engine:
-                raise Exception("Query engine not available")
-                
-            self.progress_updated.emit(30, "Parsing natural language...")
-            processed_query = self.query_engine.process_query(self.command_text, self.context)
-            
-            self.progress_updated.emit(70, "Validating query...")
-            time.sleep(0.5)  # Brief pause for UI feedback
-            
-            self.progress_updated.emit(100, "Processing complete")
-            self.processing_finished.emit(self.command_text, processed_query)
+    Returns:
+        Text for the component details display
+    """
+    comp_lines = ["Component Details:", "=" * 20, ""]
+    
+    for (component, (_, _, label)), available in zip(_COMPONENT_MODULES.items(), availability):
+        if component in _IMPORT_ERRORS:
+            comp_lines.append(f"❌ {label}: {_IMPORT_ERRORS[component]}\n")
+        elif available is None:
+            comp_lines.append(f"⏳ {label}: not yet loaded\n")
+        
+    if all(availability):
+        comp_lines.append("✅ All components loaded successfully!")
+        
+    return "\n".join(comp_lines)
+
+# Status messages shown for the NLP task's progress checkpoints
+_PROGRESS_MESSAGES = (
+    (100, "Processing complete"),
+    (70, "Validating query..."),
+    (30, "Parsing natural language..."),
+    (0, "Initializing NLP processing..."),
+)
+
+class _Throttled:
+    """Leading/trailing-edge throttle for a main-thread slot.
+    
+    The first call runs immediately; calls arriving within the timeout are
+    coalesced and only the latest one runs when the timer expires (the same
+    behaviour as superqt's qthrottled).
+    """
+    
+    def __init__(self, func, timeout: int = 50):
+        self._func = func
+        self._pending = None
+        self._timer = QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(timeout)
+        self._timer.timeout.connect(self._on_timeout)
+        
+    def __call__(self, *args):
+        if self._timer.isActive():
+            self._pending = args
+            return
+        self._func(*args)
+        self._timer.start()
+        
+    def _on_timeout(self):
+        if self._pending is not None:
+            args, self._pending = self._pending, None
+            self._func(*args)
+            self._timer.start()
             
-        except Exception as e:
-            error_msg = f"NLP processing failed: {str(e)}"
-            self.processing_failed.emit(self.command_text, error_msg)
+    def cancel(self):
+        """Drop any pending trailing call."""
+        self._pending = None
+        self._timer.stop()
+
+class PerformanceMetrics:
+    """Per-session command counters, updated once per processed command."""
+    
+    __slots__ = ('commands_processed', 'successful_commands', 'failed_commands',
+                 'average_processing_time')
+    
+    def __init__(self):
+        self.commands_processed = 0
+        self.successful_commands = 0
+        self.failed_commands = 0
+        self.average_processing_time = 0.0
 
 class NLPGISPlugin:
     """
@@ -130,101 +208,183 @@ class NLPGISPlugin:
         self.query_engine = None
         self.testing_framework = None
         
-        # Threading
-        self.thread_pool = ThreadPoolExecutor(max_workers=2)
-        self.processing_thread = None
+        # Background tasks by request ID (references keep them alive until they finish)
+        self._tasks = {}
+        self._task_ids = itertools.count()
+        
+        # Component initialization (NLP components load on a background task)
+        self._init_task = None
+        self._components_initialized = False
+        self._on_components_ready = []
         
         # State tracking
-        self.command_history = []
         self.max_history = 100
+        self.command_history = deque(maxlen=self.max_history)
         self.session_start_time = time.time()
         
-        # Component availability status
-        self.component_status = {
-            'nlp_engine': NLP_ENGINE_AVAILABLE,
-            'qgis_integration': QGIS_INTEGRATION_AVAILABLE,
-            'error_system': ERROR_SYSTEM_AVAILABLE,
-            'query_engine': QUERY_ENGINE_AVAILABLE,
-            'testing_framework': TESTING_FRAMEWORK_AVAILABLE
-        }
+        # Component availability status (None until first initialization)
+        self.component_status = dict(_AVAILABILITY)
         
         # Performance metrics
-        self.performance_metrics = {
-            'commands_processed': 0,
-            'successful_commands': 0,
-            'failed_commands': 0,
-            'average_processing_time': 0,
-            'total_processing_time': 0
-        }
-        
-        # Setup monitoring timer
+        self.performance_metrics = PerformanceMetrics()
+        
+        # Setup monitoring timer (only runs while the dock is visible)
         self.monitoring_timer = QTimer()
+        self.monitoring_timer.setInterval(5000)
         self.monitoring_timer.timeout.connect(self._update_performance_display)
-        self.monitoring_timer.start(5000)
         
-    def _check_dependencies(self) -> Dict[str, Any]:
-        """Check which dependencies are available."""
-        dependency_status = {}
+        # Progress updates are coalesced into at most one repaint per 50 ms
+        self._throttled_progress = _Throttled(self._on_progress_updated, timeout=50)
         
-        # Check Python path fix
-        dependency_status['python_path_fixed'] = os.environ.get('PYTHONNOUSERSITE') == '1'
+        # Dependency status cache (kept for the session) and display debouncing
+        self._deps_cache = None
+        self._dependency_update_timer = QTimer()
+        self._dependency_update_timer.setSingleShot(True)
+        self._dependency_update_timer.setInterval(150)
+        self._dependency_update_timer.timeout.connect(self._do_update_dependency_display)
         
-        # Check heavy NLP libraries
-        for lib in ['torch', 'transformers', 'spacy', 'datasets']:
-            try:
-                __import__(lib)
-                dependency_status[lib] = True
-            except ImportError:
-                dependency_status[lib] = False
+    def _check_dependencies(self, force: bool = False) -> Dict[str, Any]:
+        """Check which dependencies are available.
+        
+        Args:
+            force: Re-probe libraries instead of using the session cache
+            
+        Returns:
+            Dictionary of dependency and component availability
+        """
+        if force or self._deps_cache is None:
+            library_status = {}
+            
+            # Check Python path fix
+            library_status['python_path_fixed'] = os.environ.get('PYTHONNOUSERSITE') == '1'
+            
+            # Check heavy NLP libraries without importing (and initializing) them
+            for lib in ['torch', 'transformers', 'spacy', 'datasets']:
+                try:
+                    library_status[lib] = importlib.util.find_spec(lib) is not None
+                except (ImportError, ValueError):
+                    library_status[lib] = False
+                    
+            self._deps_cache = library_status
+        
+        dependency_status = dict(self._deps_cache)
         
         # Check component availability
         dependency_status['components'] = self.component_status.copy()
         
         return dependency_status
         
-    def _init_components(self):
-        """Initialize components with graceful error handling."""
-        dependency_status = self._check_dependencies()
+    def _init_components(self, on_ready=None):
+        """Initialize components with graceful error handling.
         
+        The error system and QGIS integration touch iface and are built on
+        the main thread. The NLP engine, query engine and testing framework
+        are imported and constructed on a background QgsTask so loading
+        spaCy doesn't freeze the UI; the task is started before the QGIS
+        integration is built so the two overlap.
+        
+        Args:
+            on_ready: Optional callable run on the main thread once all
+                components have been initialized
+                
+        Returns:
+            True if initialization was started (or is already running)
+        """
+        if on_ready:
+            self._on_components_ready.append(on_ready)
+        if self._init_task is not None:
+            return True
+            
         try:
-            # Initialize available components
-            if self.component_status['error_system']:
+            # The error system is needed by the testing framework built on the task
+            ErrorSystem = _lazy_import('error_system')
+            if ErrorSystem and not self.error_system:
                 self.error_system = ErrorSystem(self.iface)
                 
-            if self.component_status['nlp_engine']:
-                self.nlp_engine = NLPEngine()
-                
-            if self.component_status['qgis_integration']:
-                self.qgis_integration = QGISIntegration(self.iface)
-                
-            if self.component_status['query_engine'] and self.nlp_engine:
-                self.query_engine = QueryEngine(self.nlp_engine, QgsProject.instance())
-                
-            if self.component_status['testing_framework']:
-                self.testing_framework = TestingFramework(
-                    self.nlp_engine, self.query_engine, self.error_system
-                )
+        except Exception as e:
+            self._on_components_ready.clear()
+            self._report_init_error(e)
+            return False
             
-            # Log successful initialization
-            available_count = sum(self.component_status.values())
-            total_count = len(self.component_status)
+        if self.status_label:
+            self.status_label.setText("Loading NLP components...")
             
-            QgsMessageLog.logMessage(
-                f"NLP GIS Plugin: {available_count}/{total_count} components initialized",
-                "NLP GIS Plugin",
-                Qgis.Info
-            )
+        self._init_task = QgsTask.fromFunction(
+            'NLP GIS: loading components', self._build_nlp_components,
+            QgsProject.instance(), self.error_system,
+            on_finished=self._on_components_built
+        )
+        QgsApplication.taskManager().addTask(self._init_task)
+        
+        # Build the QGIS integration while the NLP components load
+        try:
+            QGISIntegration = _lazy_import('qgis_integration')
+            if QGISIntegration and not self.qgis_integration:
+                self.qgis_integration = QGISIntegration(self.iface)
+        except Exception as e:
+            self._report_init_error(e)
             
-            return True
+        return True
+        
+    def _report_init_error(self, error: Exception):
+        """Log a component initialization error and show it in the status label."""
+        error_msg = f"Error initializing components: {str(error)}"
+        QgsMessageLog.logMessage(error_msg, "NLP GIS Plugin", Qgis.Critical)
+        
+        if self.status_label:
+            self.status_label.setText(f"Initialization error: {str(error)}")
+        
+    @staticmethod
+    def _build_nlp_components(task, project, error_system):
+        """Import and construct the NLP components on a QgsTask worker thread."""
+        nlp_engine = query_engine = testing_framework = None
+        
+        NLPEngine = _lazy_import('nlp_engine')
+        if NLPEngine:
+            nlp_engine = NLPEngine()
+        task.setProgress(60)
             
-        except Exception as e:
-            error_msg = f"Error initializing components: {str(e)}"
-            QgsMessageLog.logMessage(error_msg, "NLP GIS Plugin", Qgis.Critical)
+        QueryEngine = _lazy_import('query_engine')
+        if QueryEngine and nlp_engine:
+            query_engine = QueryEngine(nlp_engine, project)
+        task.setProgress(80)
+            
+        TestingFramework = _lazy_import('testing_framework')
+        if TestingFramework:
+            testing_framework = TestingFramework(nlp_engine, query_engine, error_system)
             
-            if self.status_label:
-                self.status_label.setText(f"Initialization error: {str(e)}")
+        return nlp_engine, query_engine, testing_framework
+        
+    def _on_components_built(self, exception, result=None):
+        """Store the background-built components and notify waiters (main thread)."""
+        self._init_task = None
+        self._components_initialized = True
+        
+        if exception is None:
+            self.nlp_engine, self.query_engine, self.testing_framework = result
+        else:
+            self._report_init_error(exception)
                 
-            return False
+        self.component_status.update(_AVAILABILITY)
+        
+        # Log initialization
+        available_count = sum(1 for available in self.component_status.values() if available)
+        total_count = len(self.component_status)
+        
+        QgsMessageLog.logMessage(
+            f"NLP GIS Plugin: {available_count}/{total_count} components initialized",
+            "NLP GIS Plugin",
+            Qgis.Info
+        )
+        
+        if exception is None and self.status_label:
+            self.status_label.setText("Ready")
+        if self.dock_widget is not None:
+            self._update_dependency_display()
+            
+        callbacks, self._on_components_ready = self._on_components_ready, []
+        for callback in callbacks:
+            callback()
     
     def initGui(self):
         """Create the menu entries and toolbar icons inside the QGIS GUI."""
@@ -241,8 +401,7 @@ class NLPGISPlugin:
         self.iface.addToolBarIcon(self.action)
         self.iface.addPluginToMenu("NLP GIS Assistant", self.action)
         
-        # Create the dock widget UI
-        self._create_dock_widget()
+        # The dock widget is created on first run()
     
     def _create_dock_widget(self):
         """Create the dock widget with dependency status."""
@@ -261,9 +420,17 @@ class NLPGISPlugin:
         self._create_status_tab()
         
         self.dock_widget.setWidget(main_widget)
+        self.dock_widget.visibilityChanged.connect(self._on_dock_visibility_changed)
         self.iface.addDockWidget(Qt.RightDockWidgetArea, self.dock_widget)
         self.dock_widget.hide()
         
+    def _on_dock_visibility_changed(self, visible: bool):
+        """Only run periodic monitoring while the dock is shown."""
+        if visible:
+            self.monitoring_timer.start()
+        else:
+            self.monitoring_timer.stop()
+        
     def _create_main_interface_tab(self):
         """Create the main interface tab."""
         tab = QWidget()
@@ -330,7 +497,7 @@ class NLPGISPlugin:
         
         # Refresh button
         refresh_btn = QPushButton("Refresh Status")
-        refresh_btn.clicked.connect(self._update_dependency_display)
+        refresh_btn.clicked.connect(self._refresh_dependency_status)
         deps_layout.addWidget(refresh_btn)
         
         layout.addWidget(deps_group)
@@ -350,75 +517,81 @@ class NLPGISPlugin:
         # Initial update
         self._update_dependency_display()
         
+    def _refresh_dependency_status(self):
+        """Re-probe dependencies and update the display immediately."""
+        self._check_dependencies(force=True)
+        self._dependency_update_timer.stop()
+        self._do_update_dependency_display()
+        
     def _update_dependency_display(self):
+        """Schedule a dependency display update, coalescing rapid calls."""
+        self._dependency_update_timer.start()
+        
+    def _do_update_dependency_display(self):
         """Update the dependency status display."""
         try:
             status = self._check_dependencies()
             
-            text = "Python Environment Status:\n"
-            text += "=" * 30 + "\n\n"
-            
             # Python path fix status
             path_fix = "✅" if status.get('python_path_fixed', False) else "❌"
-            text += f"{path_fix} Python Path Fix Applied\n\n"
+            lines = [
+                "Python Environment Status:",
+                "=" * 30,
+                "",
+                f"{path_fix} Python Path Fix Applied",
+                "",
+                "NLP Libraries:",
+            ]
             
             # Library status
-            text += "NLP Libraries:\n"
             for lib in ['torch', 'transformers', 'spacy', 'datasets']:
-                lib_status = "✅" if status.get(lib, False) else "❌"
-                text += f"{lib_status} {lib}\n"
+                if not status.get(lib, False):
+                    lines.append(f"❌ {lib}")
+                elif lib in sys.modules:
+                    lines.append(f"✅ {lib} (loaded)")
+                else:
+                    lines.append(f"✅ {lib} (installed, not yet loaded)")
             
-            text += "\nComponent Status:\n"
+            lines.append("\nComponent Status:")
             for component, available in status.get('components', {}).items():
-                comp_status = "✅" if available else "❌"
-                text += f"{comp_status} {component}\n"
+                if available is None:
+                    lines.append(f"⏳ {component} (not yet loaded)")
+                else:
+                    comp_status = "✅" if available else "❌"
+                    lines.append(f"{comp_status} {component}")
             
             # Recommendations
-            text += "\n" + "=" * 30 + "\n"
-            text += "Recommendations:\n"
+            lines.append("\n" + "=" * 30)
+            lines.append("Recommendations:")
             
             if not status.get('python_path_fixed', False):
-                text += "• Python path fix not applied - restart QGIS\n"
+                lines.append("• Python path fix not applied - restart QGIS")
                 
             missing_libs = [lib for lib in ['torch', 'transformers', 'spacy'] 
                           if not status.get(lib, False)]
             if missing_libs:
-                text += f"• Missing libraries: {', '.join(missing_libs)}\n"
-                text += "• Install using: pip install --no-user [library_name]\n"
+                lines.append(f"• Missing libraries: {', '.join(missing_libs)}")
+                lines.append("• Install using: pip install --no-user [library_name]")
                 
-            available_components = sum(status.get('components', {}).values())
-            total_components = len(status.get('components', {}))
+            components = status.get('components', {})
+            available_components = sum(1 for available in components.values() if available)
+            total_components = len(components)
             
-            if available_components == total_components:
-                text += "• All components available - full functionality enabled\n"
+            if any(available is None for available in components.values()):
+                lines.append("• Components load when the first command is run")
+            elif available_components == total_components:
+                lines.append("• All components available - full functionality enabled")
             elif available_components > 0:
-                text += "• Partial functionality available - some features may be limited\n"
+                lines.append("• Partial functionality available - some features may be limited")
             else:
-                text += "• No components available - plugin may not function properly\n"
+                lines.append("• No components available - plugin may not function properly")
             
-            self.dependency_display.setText(text)
+            self.dependency_display.setText("\n".join(lines))
             
             # Update component status
-            comp_text = "Component Details:\n"
-            comp_text += "=" * 20 + "\n\n"
-            
-            if not NLP_ENGINE_AVAILABLE:
-                comp_text += f"❌ NLP Engine: {NLP_ENGINE_ERROR}\n\n"
-            if not QGIS_INTEGRATION_AVAILABLE:
-                comp_text += f"❌ QGIS Integration: {QGIS_INTEGRATION_ERROR}\n\n"
-            if not ERROR_SYSTEM_AVAILABLE:
-                comp_text += f"❌ Error System: {ERROR_SYSTEM_ERROR}\n\n"
-            if not QUERY_ENGINE_AVAILABLE:
-                comp_text += f"❌ Query Engine: {QUERY_ENGINE_ERROR}\n\n"
-            if not TESTING_FRAMEWORK_AVAILABLE:
-                comp_text += f"❌ Testing Framework: {TESTING_FRAMEWORK_ERROR}\n\n"
-                
-            if all([NLP_ENGINE_AVAILABLE, QGIS_INTEGRATION_AVAILABLE, 
-                   ERROR_SYSTEM_AVAILABLE, QUERY_ENGINE_AVAILABLE, 
-                   TESTING_FRAMEWORK_AVAILABLE]):
-                comp_text += "✅ All components loaded successfully!"
-                
-            self.components_display.setText(comp_text)
+            self.components_display.setText(
+                _component_details_text(tuple(_AVAILABILITY.values()))
+            )
             
         except Exception as e:
             self.dependency_display.setText(f"Error checking dependencies: {str(e)}")
@@ -430,14 +603,19 @@ class NLPGISPlugin:
             self.result_output.setText("Please enter a command.")
             return
         
-        # Check if we have required components
-        if not self.query_engine:
-            if not self._init_components():
+        # Only one command runs at a time; the query engine isn't thread-safe
+        if self._tasks:
+            self.status_label.setText("Busy - please wait for the current command to finish.")
+            return
+        
+        # Load components first; the command runs once they are ready
+        if not self.query_engine and not self._components_initialized:
+            if not self._init_components(on_ready=self.process_command):
                 self.result_output.setText(
                     "❌ Cannot process command - required components not available.\n\n"
                     "Please check the 'Status & Diagnostics' tab for more information."
                 )
-                return
+            return
         
         # Clear input and show processing
         self.command_input.clear()
@@ -446,53 +624,84 @@ class NLPGISPlugin:
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
         
-        # Record start time
-        start_time = time.time()
+        # Record start time (monotonic, so durations survive clock changes)
+        start_time = time.monotonic()
         
-        # Add to history
-        self.command_history.append({
-            'timestamp': time.time(),
-            'command': command_text,
-            'start_time': start_time
-        })
+        # Add to history as (start time, command)
+        self.command_history.append((start_time, command_text))
         
-        # Get context
+        # Snapshot context on the main thread: it reads iface widgets, which
+        # must not be touched from the task
         context = None
         if (self.qgis_integration and 
             hasattr(self.qgis_integration, 'event_dispatcher') and
             self.qgis_integration.event_dispatcher):
             try:
-                context = self.qgis_integration.event_dispatcher.get_current_context()
+                context = _snapshot_context(
+                    self.qgis_integration.event_dispatcher.get_current_context()
+                )
             except Exception as e:
                 QgsMessageLog.logMessage(f"Error getting context: {str(e)}", "NLP GIS Plugin", Qgis.Warning)
         
-        # Process using thread
-        self.processing_thread = NLPProcessingThread(self.query_engine, command_text, context)
-        self.processing_thread.processing_finished.connect(
-            lambda cmd, result: self._on_processing_finished(cmd, result, start_time)
+        # Process on the QGIS task manager; per-command state rides on the
+        # task, which the finish callback looks up by request ID
+        request_id = next(self._task_ids)
+        task = QgsTask.fromFunction(
+            'NLP Query', self._run_query_task, self.query_engine, command_text, context,
+            on_finished=functools.partial(self._on_task_finished, request_id)
         )
-        self.processing_thread.processing_failed.connect(
-            lambda cmd, error: self._on_processing_failed(cmd, error, start_time)
-        )
-        self.processing_thread.progress_updated.connect(self._on_progress_updated)
-        
-        self.processing_thread.start()
+        task.command_text = command_text
+        task.start_time = start_time
+        task.progressChanged.connect(self._throttled_progress)
+        self._tasks[request_id] = task
+        QgsApplication.taskManager().addTask(task)
+    
+    @staticmethod
+    def _run_query_task(task, query_engine, command_text: str, context: Optional[Dict[str, Any]]):
+        """Parse a command on a QgsTask worker thread."""
+        task.setProgress(10)
+        if not query_engine:
+            raise Exception("Query engine not available")
+            
+        task.setProgress(30)
+        processed_query = query_engine.process_query(command_text, context)
+        task.setProgress(70)
+        return processed_query
     
-    def _on_progress_updated(self, percentage: int, message: str):
+    def _on_task_finished(self, request_id: int, exception, result=None):
+        """Dispatch a finished QgsTask to the result handlers (main thread)."""
+        task = self._tasks.pop(request_id)
+        self._throttled_progress.cancel()
+        # The result handlers hide the progress bar and replace the status
+        # text, so there is no separate 100% update to paint
+        if task.isCanceled() or (exception is None and result is None):
+            # fromFunction reports a cancelled task without a result
+            self._on_processing_cancelled(task.command_text)
+        elif exception is None:
+            self._on_processing_finished(task.command_text, result, task.start_time)
+        else:
+            error_msg = f"NLP processing failed: {str(exception)}"
+            self._on_processing_failed(task.command_text, error_msg, task.start_time)
+    
+    def _on_progress_updated(self, progress: float):
         """Handle progress updates."""
+        percentage = int(progress)
         self.progress_bar.setValue(percentage)
-        self.status_label.setText(message)
+        for threshold, message in _PROGRESS_MESSAGES:
+            if percentage >= threshold:
+                if self.status_label.text() != message:
+                    self.status_label.setText(message)
+                break
     
     def _on_processing_finished(self, command_text: str, processed_query: Dict[str, Any], start_time: float):
         """Handle successful processing."""
         try:
-            processing_time = time.time() - start_time
-            self.performance_metrics['total_processing_time'] += processing_time
+            processing_time = time.monotonic() - start_time
+            self._record_processing_time(processing_time)
             self.progress_bar.setVisible(False)
             
             # Create result message
-            result_message = f"Command: {command_text}\n"
-            result_message += f"Processing Time: {processing_time:.2f}s\n\n"
+            header = f"Command: {command_text}\nProcessing Time: {processing_time:.2f}s\n"
             
             # Check if we have QGIS integration for execution
             if self.qgis_integration:
@@ -509,73 +718,108 @@ class NLPGISPlugin:
                     success, message = self.qgis_integration.process_nlp_command(processed_query)
                     
                     if success:
-                        result_message += f"✅ Successfully executed: {processed_query.get('operation')}\n\n"
-                        result_message += f"Operation Details:\n"
-                        result_message += f"• Operation: {processed_query.get('operation')}\n"
-                        
-                        if processed_query.get('input_layer'):
-                            result_message += f"• Input Layer: {processed_query.get('input_layer')}\n"
-                        if processed_query.get('secondary_layer'):
-                            result_message += f"• Overlay Layer: {processed_query.get('secondary_layer')}\n"
-                        if processed_query.get('parameters'):
-                            result_message += f"• Parameters:\n"
-                            for key, value in processed_query.get('parameters', {}).items():
-                                if not key.startswith('auto_completed'):
-                                    result_message += f"  ◦ {key}: {value}\n"
-                        
-                        result_message += f"\nExecution Message: {message}"
-                        self.performance_metrics['successful_commands'] += 1
+                        body = self._format_execution_success(processed_query, message)
+                        self.performance_metrics.successful_commands += 1
                     else:
-                        result_message += f"❌ Error executing command: {message}\n"
-                        if suggestions:
-                            result_message += "\nSuggestions:\n"
-                            for suggestion in suggestions:
-                                result_message += f"• {suggestion}\n"
-                        self.performance_metrics['failed_commands'] += 1
+                        body = self._format_execution_failure(message, suggestions)
+                        self.performance_metrics.failed_commands += 1
                 else:
-                    result_message += "⚠️ Command validation failed:\n\n"
-                    for issue in issues:
-                        severity = issue.get('severity', 'error')
-                        message = issue.get('message', 'Unknown issue')
-                        icon = "🔴" if severity == 'error' else "🟡"
-                        result_message += f"{icon} {severity.upper()}: {message}\n"
-                    
-                    if suggestions:
-                        result_message += "\nSuggestions:\n"
-                        for suggestion in suggestions:
-                            result_message += f"• {suggestion}\n"
+                    body = self._format_validation_failure(issues, suggestions)
             else:
-                # No QGIS integration, just show parsed result
-                result_message += f"✅ Command parsed successfully:\n"
-                result_message += f"• Operation: {processed_query.get('operation')}\n"
-                result_message += f"• Confidence: {processed_query.get('confidence', 0):.2f}\n"
-                result_message += f"• Processing Method: {processed_query.get('processing_method', 'unknown')}\n"
-                result_message += "\n⚠️ QGIS integration not available - command parsed but not executed"
+                body = self._format_parse_only(processed_query)
             
+            result_message = f"{header}\n{body}"
             self.status_label.setText("Command processing complete")
             
         except Exception as e:
-            result_message = f"Error in result processing: {str(e)}\n\n{traceback.format_exc()}"
+            # Full traceback goes to the message log; the UI only needs the error
+            result_message = f"Error in result processing: {str(e)}"
+            QgsMessageLog.logMessage(traceback.format_exc(), "NLP GIS Plugin", Qgis.Warning)
             
         finally:
             self.result_output.setText(result_message)
-            self.performance_metrics['commands_processed'] += 1
+    
+    @staticmethod
+    def _format_execution_success(processed_query: Dict[str, Any], message: str) -> str:
+        """Format the result text for a successfully executed command."""
+        operation = processed_query.get('operation')
+        parts = [f"✅ Successfully executed: {operation}\n\n"
+                 f"Operation Details:\n"
+                 f"• Operation: {operation}"]
+        
+        input_layer = processed_query.get('input_layer')
+        if input_layer:
+            parts.append(f"• Input Layer: {input_layer}")
+        secondary_layer = processed_query.get('secondary_layer')
+        if secondary_layer:
+            parts.append(f"• Overlay Layer: {secondary_layer}")
+        parameters = processed_query.get('parameters')
+        if parameters:
+            parts.append("• Parameters:")
+            parts.extend(f"  ◦ {key}: {value}" for key, value in parameters.items()
+                         if not key.startswith('auto_completed'))
+            
+        parts.append(f"\nExecution Message: {message}")
+        return "\n".join(parts)
+    
+    @staticmethod
+    def _format_suggestions(suggestions: List[str]) -> str:
+        """Format a suggestions block, or an empty string if there are none."""
+        if not suggestions:
+            return ""
+        return "\n\nSuggestions:\n" + "\n".join(f"• {suggestion}" for suggestion in suggestions)
+    
+    @classmethod
+    def _format_execution_failure(cls, message: str, suggestions: List[str]) -> str:
+        """Format the result text for a command whose execution failed."""
+        return f"❌ Error executing command: {message}" + cls._format_suggestions(suggestions)
+    
+    @classmethod
+    def _format_validation_failure(cls, issues: List[Dict[str, Any]], suggestions: List[str]) -> str:
+        """Format the result text for a command that failed validation."""
+        issue_lines = "\n".join(
+            f"{'🔴' if issue.get('severity', 'error') == 'error' else '🟡'} "
+            f"{issue.get('severity', 'error').upper()}: {issue.get('message', 'Unknown issue')}"
+            for issue in issues
+        )
+        return f"⚠️ Command validation failed:\n\n{issue_lines}" + cls._format_suggestions(suggestions)
+    
+    @staticmethod
+    def _format_parse_only(processed_query: Dict[str, Any]) -> str:
+        """Format the result text when there is no QGIS integration to execute with."""
+        return (f"✅ Command parsed successfully:\n"
+                f"• Operation: {processed_query.get('operation')}\n"
+                f"• Confidence: {processed_query.get('confidence', 0):.2f}\n"
+                f"• Processing Method: {processed_query.get('processing_method', 'unknown')}\n\n"
+                f"⚠️ QGIS integration not available - command parsed but not executed")
     
     def _on_processing_failed(self, command_text: str, error_message: str, start_time: float):
         """Handle failed processing."""
-        processing_time = time.time() - start_time
-        self.performance_metrics['total_processing_time'] += processing_time
+        processing_time = time.monotonic() - start_time
+        self._record_processing_time(processing_time)
         self.progress_bar.setVisible(False)
         
-        result_message = f"Command: {command_text}\n"
-        result_message += f"Processing Time: {processing_time:.2f}s\n\n"
-        result_message += f"❌ {error_message}"
-        
-        self.result_output.setText(result_message)
+        self.result_output.setText(
+            f"Command: {command_text}\n"
+            f"Processing Time: {processing_time:.2f}s\n\n"
+            f"❌ {error_message}"
+        )
         self.status_label.setText("Command processing failed")
         
-        self.performance_metrics['commands_processed'] += 1
-        self.performance_metrics['failed_commands'] += 1
+        self.performance_metrics.failed_commands += 1
+        
+    def _on_processing_cancelled(self, command_text: str):
+        """Handle a command whose task was cancelled before it finished."""
+        self.progress_bar.setVisible(False)
+        self.result_output.setText(f"Command: {command_text}\n\n⚠️ Command cancelled")
+        self.status_label.setText("Command cancelled")
+    
+    def _record_processing_time(self, processing_time: float):
+        """Count a processed command and update the running average time."""
+        metrics = self.performance_metrics
+        n = metrics.commands_processed + 1
+        metrics.average_processing_time += (processing_time - metrics.average_processing_time) / n
+        metrics.commands_processed = n
     
     def _update_performance_display(self):
         """Update performance metrics periodically."""
@@ -584,13 +828,16 @@ class NLPGISPlugin:
     
     def run(self):
         """Show/hide the dock widget."""
+        if self.dock_widget is None:
+            self._create_dock_widget()
+            
         if self.dock_widget.isVisible():
             self.dock_widget.hide()
         else:
             self.dock_widget.show()
             
             # Initialize components if not done yet
-            if not any(self.component_status.values()):
+            if not self._components_initialized:
                 self._init_components()
                 
             # Update status displays
@@ -598,17 +845,18 @@ class NLPGISPlugin:
     
     def unload(self):
         """Clean up when plugin is unloaded."""
-        # Stop monitoring timer
+        # Stop timers
         if hasattr(self, 'monitoring_timer'):
             self.monitoring_timer.stop()
+        self._dependency_update_timer.stop()
+        self._throttled_progress.cancel()
             
-        # Stop any running threads
-        if self.processing_thread and self.processing_thread.isRunning():
-            self.processing_thread.quit()
-            self.processing_thread.wait()
-            
-        # Shutdown thread pool
-        self.thread_pool.shutdown(wait=False)
+        # Cancel any running tasks
+        self._on_components_ready.clear()
+        if self._init_task is not None:
+            self._init_task.cancel()
+        for task in list(self._tasks.values()):
+            task.cancel()
         
         # Clean up components
         if self.qgis_integration:
@@ -1,4 +1,6 @@
 # qgis_integration/__init__.py
+import functools
+
 from .async_processor import AsyncTaskManager
 from .memory_manager import MemoryManager
 from .event_dispatcher import GISEventDispatcher
@@ -6,6 +8,21 @@ from .event_dispatcher import GISEventDispatcher
 class QGISIntegration:
     """Main integration class for connecting NLP with QGIS."""
     
+    # Maximum number of (command, layers, CRS) results kept by submit_nlp_task
+    NLP_CACHE_SIZE = 256
+    
+    # command type -> (GIS operation, ((key, sub key, argument, description), ...))
+    OPERATION_SCHEMAS = {
+        'buffer': ('buffer', (
+            ('input_layer', None, 'input_layer', 'input layer'),
+            ('parameters', 'distance', 'distance', 'distance'),
+        )),
+        'clip': ('clip', (
+            ('input_layer', None, 'input_layer', 'input layer'),
+            ('secondary_layer', None, 'overlay_layer', 'overlay layer'),
+        )),
+    }
+    
     def __init__(self, iface):
         """
         Initialize QGIS integration components.
@@ -20,77 +37,47 @@ class QGISIntegration:
         self.memory_manager = MemoryManager()
         self.event_dispatcher = GISEventDispatcher(iface)
         
+        # NLP results keyed on the command and the context it was parsed in
+        self._nlp_cache = functools.lru_cache(maxsize=self.NLP_CACHE_SIZE)(self._process_nlp_uncached)
+        
         # Register standard GIS operations
         self._register_operation_handlers()
         
     def _register_operation_handlers(self):
         """Register handlers for common GIS operations."""
-        # Register buffer operation
-        self.event_dispatcher.register_command_handler(
-            'buffer', 
-            lambda cmd: self._handle_buffer_command(cmd)
-        )
-        
-        # Register clip operation
-        self.event_dispatcher.register_command_handler(
-            'clip',
-            lambda cmd: self._handle_clip_command(cmd)
-        )
-        
-        # Register select operation
-        self.event_dispatcher.register_command_handler(
-            'select',
-            lambda cmd: self._handle_select_command(cmd)
-        )
-        
-        # Register intersect operation
-        self.event_dispatcher.register_command_handler(
-            'intersect',
-            lambda cmd: self._handle_intersect_command(cmd)
-        )
-        
-    def _handle_buffer_command(self, command):
-        """Handle buffer command execution."""
-        # Extract parameters from the command
-        input_layer = command.get('input_layer')
-        distance = command.get('parameters', {}).get('distance')
-        
-        if not input_layer:
-            raise ValueError("No input layer specified for buffer operation")
-        
-        if not distance:
-            raise ValueError("No distance specified for buffer operation")
-            
-        # Execute the buffer operation
-        success, message, result = self.event_dispatcher.execute_gis_operation(
-            'buffer',
-            input_layer=input_layer,
-            distance=distance
-        )
-        
-        if not success:
-            raise RuntimeError(message)
+        for command_type, (operation, fields) in self.OPERATION_SCHEMAS.items():
+            self.event_dispatcher.register_command_handler(
+                command_type,
+                functools.partial(self._handle_operation_command, operation, fields)
+            )
             
-        return result
-        
-    def _handle_clip_command(self, command):
-        """Handle clip command execution."""
-        # Extract parameters from the command
-        input_layer = command.get('input_layer')
-        overlay_layer = command.get('secondary_layer')
+        # Operations that are not wired to execute_gis_operation yet
+        self.event_dispatcher.register_command_handler('select', self._handle_select_command)
+        self.event_dispatcher.register_command_handler('intersect', self._handle_intersect_command)
         
-        if not input_layer:
-            raise ValueError("No input layer specified for clip operation")
+    def _handle_operation_command(self, operation, fields, command):
+        """
+        Handle a command by extracting its arguments with an OPERATION_SCHEMAS entry.
         
-        if not overlay_layer:
-            raise ValueError("No overlay layer specified for clip operation")
+        Args:
+            operation: GIS operation passed to execute_gis_operation
+            fields: Argument descriptors from OPERATION_SCHEMAS
+            command: Interpreted command dictionary
             
-        # Execute the clip operation
-        success, message, result = self.event_dispatcher.execute_gis_operation(
-            'clip',
-            input_layer=input_layer,
-            overlay_layer=overlay_layer
-        )
+        Returns:
+            Result of the GIS operation
+        """
+        kwargs = {}
+        for key, sub_key, argument, description in fields:
+            value = command.get(key)
+            if sub_key is not None:
+                value = value.get(sub_key) if value else None
+            if not value:
+                raise ValueError(f"No {description} specified for {operation} operation")
+            kwargs[argument] = value
+            
+        # Execute the GIS operation
+        success, message, result = self.event_dispatcher.execute_gis_operation(operation, **kwargs)
         
         if not success:
             raise RuntimeError(message)
@@ -134,25 +121,14 @@ class QGISIntegration:
         # Get current GIS context
         context = self.event_dispatcher.get_current_context()
         
+        # Results depend on the layers and CRS, so they are part of the key
+        active_layers = tuple(layer['name'] for layer in context['active_layers'])
+        crs = context['crs']
+        
         # Create a function that will run in the background
         def process_nlp():
             try:
-                # Attempt to get from cache first
-                cached_result = self.memory_manager.get_cached_data(f"cmd_{command_text}")
-                if cached_result:
-                    return cached_result
-                
-                # Process with current context
-                result = nlp_engine.process_command(
-                    command_text,
-                    active_layers=[layer['name'] for layer in context['active_layers']],
-                    current_crs=context['crs']
-                )
-                
-                # Cache the result
-                self.memory_manager.cache_data(f"cmd_{command_text}", result)
-                
-                return result
+                return self._nlp_cache(nlp_engine, command_text, active_layers, crs)
             except Exception as e:
                 # Re-raise to be caught by the async manager
                 raise RuntimeError(f"NLP processing error: {str(e)}")
@@ -160,9 +136,19 @@ class QGISIntegration:
         # Submit the task for background processing
         return self.async_manager.submit_task(process_nlp)
     
+    def _process_nlp_uncached(self, nlp_engine, command_text, active_layers, crs):
+        """Run the NLP engine for a command in a given layer/CRS context."""
+        # The engine only reads the layer names, so the key's tuple is reused
+        return nlp_engine.process_command(
+            command_text,
+            active_layers=active_layers,
+            current_crs=crs
+        )
+    
     def cleanup(self):
         """Clean up resources when the plugin is unloaded."""
         # Clean up components
+        self._nlp_cache.cache_clear()
         self.async_manager.cleanup()
         self.memory_manager.cleanup()
         self.event_dispatcher.cleanup()
\ No newline at end of file
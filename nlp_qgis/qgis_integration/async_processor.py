@@ -1,10 +1,40 @@
 # qgis_integration/async_processor.py
 import asyncio
 import concurrent.futures
+import functools
+import itertools
+import os
 import threading
 import time
+from collections import OrderedDict, deque
 from typing import Any, Callable, Dict, Optional, Tuple
-from qgis.PyQt.QtCore import QObject, pyqtSignal, pyqtSlot
+from qgis.PyQt.QtCore import QObject, Qt, pyqtSignal, pyqtSlot
+
+class TaskRecord:
+    """Status of a submitted task, as reported by get_task_status."""
+    
+    __slots__ = ('status', 'submitted_time', 'function', 'error')
+    
+    def __init__(self):
+        self.reset('', '')
+        
+    def reset(self, status: str, function: str):
+        """Reinitialize the record for a newly submitted task."""
+        self.status = status
+        self.submitted_time = time.time()
+        self.function = function
+        self.error = None
+        
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the metadata dict exposed by get_task_status."""
+        data = {
+            'status': self.status,
+            'submitted_time': self.submitted_time,
+            'function': self.function,
+        }
+        if self.error is not None:
+            data['error'] = self.error
+        return data
 
 class AsyncTaskManager(QObject):
     """
@@ -14,98 +44,327 @@ class AsyncTaskManager(QObject):
     processing in a way that doesn't block the QGIS user interface.
     """
     
-    # Signals to communicate task status
+    # Signals to communicate task status. task_completed/task_failed are
+    # emitted from the event loop thread (or a pool thread for direct tasks).
+    # With batch_completions, tasks_completed replaces task_completed
     task_completed = pyqtSignal(str, object)  # task_id, result
+    tasks_completed = pyqtSignal(list)  # [(task_id, result), ...] per batch window
     task_failed = pyqtSignal(str, str)  # task_id, error_message
     task_progress = pyqtSignal(str, int)  # task_id, progress_percentage
     
-    def __init__(self):
-        """Initialize the async task manager."""
+    # Finished tasks whose metadata is retained for get_task_status
+    MAX_TASK_METADATA = 1024
+    
+    # Each worker process carries its own interpreter and models
+    MAX_PROCESS_WORKERS = 4
+    
+    # With batch_completions, completions within this window are reported together
+    COMPLETION_BATCH_MS = 5
+    
+    def __init__(self, max_workers: Optional[int] = None, io_bound: bool = True,
+                 isolated_loop: bool = False, prewarm_workers: int = 0,
+                 batch_completions: bool = False):
+        """
+        Initialize the async task manager.
+        
+        Args:
+            max_workers: Number of worker threads (default depends on io_bound)
+            io_bound: Size the default pool for tasks that mostly wait on I/O
+                (model downloads, remote calls) rather than compute
+            isolated_loop: Always run a private event loop in a background
+                thread, even if the caller is inside a running loop (qasync)
+            prewarm_workers: Worker threads to start up front (default none;
+                the pool otherwise starts threads as tasks arrive)
+            batch_completions: Report successes through tasks_completed, one
+                emission per COMPLETION_BATCH_MS window, instead of one
+                task_completed emission per task
+        """
         super().__init__()
         
-        # Thread pool for CPU-bound operations
-        self.thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        # Thread pool for task execution
+        cpu_count = os.cpu_count() or 1
+        if max_workers is None:
+            max_workers = min(32, cpu_count + 4) if io_bound else cpu_count
+        self.max_parallel_requests = max_workers
+        self.thread_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="nlp-task"
+        )
+        if prewarm_workers > 0:
+            self.prewarm(prewarm_workers)
+        
+        # Process pool for CPU-bound tasks, created on first use
+        self.process_pool = None
         
         # Task tracking
         self.active_tasks = {}  # task_id -> future
-        self.task_metadata = {}  # task_id -> metadata dict
+        self.task_metadata = OrderedDict()  # task_id -> TaskRecord, LRU order
+        self._id_counter = itertools.count()
+        self._meta_pool = deque(maxlen=256)  # recycled TaskRecords
+        self.batch_completions = batch_completions
+        self._completion_buf = []  # (task_id, result) awaiting flush, loop thread only
+        
+        # Reuse the host's event loop if one is running (e.g. under qasync)
+        self.loop = None
+        self.thread = None
+        if not isolated_loop:
+            try:
+                self.loop = asyncio.get_running_loop()
+            except RuntimeError:
+                pass
+                
+        if self.loop is None:
+            # Create event loop for async operations (sharing the task pool)
+            self.loop = asyncio.new_event_loop()
+            self.loop.set_default_executor(self.thread_pool)
+            
+            # Start event loop in a separate thread
+            self.thread = threading.Thread(target=self._run_event_loop, daemon=True)
+            self.thread.start()
+        
+    def prewarm(self, workers: Optional[int] = None, timeout: float = 1.0):
+        """
+        Start worker threads up front so first tasks don't pay for it.
         
-        # Create event loop for async operations
-        self.loop = asyncio.new_event_loop()
+        Each placeholder task blocks on a shared barrier, which keeps the
+        executor from reusing an idle worker and forces a new thread per
+        submission.
         
-        # Start event loop in a separate thread
-        self.thread = threading.Thread(target=self._run_event_loop, daemon=True)
-        self.thread.start()
+        Args:
+            workers: Threads to start (default: the whole pool)
+            timeout: Seconds the placeholder tasks wait for each other
+        """
+        if workers is None:
+            workers = self.max_parallel_requests
+        workers = min(workers, self.max_parallel_requests)
+        barrier = threading.Barrier(workers)
+        
+        def wait():
+            try:
+                barrier.wait(timeout)
+            except threading.BrokenBarrierError:
+                pass
+                
+        for _ in range(workers):
+            self.thread_pool.submit(wait)
+            
+    def connect_fast(self, on_completed: Callable, on_failed: Optional[Callable] = None):
+        """
+        Connect result slots without queueing through the receiver's event loop.
         
+        The slots run on the emitting worker thread, so they must be
+        thread-safe and hand any GUI work back to the main thread themselves.
+        
+        Args:
+            on_completed: Slot called with (task_id, result) for each task;
+                batched completions are unpacked into one call per task
+            on_failed: Optional slot for task_failed(task_id, error_message)
+        """
+        if self.batch_completions:
+            def on_batch(completed):
+                for task_id, result in completed:
+                    on_completed(task_id, result)
+                    
+            self.tasks_completed.connect(on_batch, Qt.DirectConnection)
+        else:
+            self.task_completed.connect(on_completed, Qt.DirectConnection)
+        if on_failed is not None:
+            self.task_failed.connect(on_failed, Qt.DirectConnection)
+            
     def _run_event_loop(self):
         """Run the asyncio event loop in a background thread."""
         asyncio.set_event_loop(self.loop)
         self.loop.run_forever()
         
+    def _on_loop_thread(self) -> bool:
+        """Check whether the caller is running inside our event loop."""
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+            
     def _create_task_id(self) -> str:
         """Create a unique task ID."""
-        return f"task_{int(time.time() * 1000)}"
+        return f"task_{next(self._id_counter)}"
         
-    async def _run_in_thread(self, func, *args, **kwargs):
-        """Run a function in the thread pool."""
-        return await self.loop.run_in_executor(
-            self.thread_pool, 
-            lambda: func(*args, **kwargs)
-        )
+    def _acquire_metadata(self) -> TaskRecord:
+        """Take a record from the pool, or allocate one."""
+        try:
+            return self._meta_pool.pop()
+        except IndexError:
+            return TaskRecord()
+        
+    def _release_metadata(self, meta: TaskRecord):
+        """Return a record that is no longer referenced to the pool."""
+        self._meta_pool.append(meta)
+        
+    def _register_task(self, func: Callable) -> str:
+        """Create a task ID and its pending metadata."""
+        task_id = self._create_task_id()
+        
+        meta = self._acquire_metadata()
+        meta.reset('pending', func.__name__)
+        self.task_metadata[task_id] = meta
+        return task_id
+        
+    def _evict_metadata(self):
+        """Drop the least recently used finished tasks beyond the cap."""
+        excess = len(self.task_metadata) - self.MAX_TASK_METADATA
+        if excess <= 0:
+            return
+            
+        # Running tasks still write to their metadata, so never evict them
+        finished = (task_id for task_id in self.task_metadata
+                    if task_id not in self.active_tasks)
+        for task_id in list(itertools.islice(finished, excess)):
+            self._release_metadata(self.task_metadata.pop(task_id))
+            
+    def _get_process_pool(self) -> concurrent.futures.ProcessPoolExecutor:
+        """Get the process pool, creating it on first use."""
+        if self.process_pool is None:
+            workers = min(self.MAX_PROCESS_WORKERS, os.cpu_count() or 1)
+            self.process_pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        return self.process_pool
         
-    async def _execute_task(self, task_id: str, func: Callable, *args, **kwargs):
+    async def _run_in_thread(self, func, *args, executor=None, **kwargs):
+        """Run a function in the thread pool, or in the given executor."""
+        call = functools.partial(func, *args, **kwargs) if args or kwargs else func
+        return await self.loop.run_in_executor(executor or self.thread_pool, call)
+        
+    async def _execute_task(self, task_id: str, func: Callable, *args,
+                            executor=None, **kwargs):
         """Execute the task and handle results/errors."""
+        meta = self.task_metadata[task_id]
         try:
             # Update status
-            self.task_metadata[task_id]['status'] = 'running'
+            meta.status = 'running'
             
-            # Execute the function in thread pool
-            result = await self._run_in_thread(func, *args, **kwargs)
+            # Execute the function in the pool
+            result = await self._run_in_thread(func, *args, executor=executor, **kwargs)
             
             # Task completed successfully
-            self.task_metadata[task_id]['status'] = 'completed'
-            self.task_completed.emit(task_id, result)
+            meta.status = 'completed'
+            self._queue_completion(task_id, result)
             
         except Exception as e:
             # Task failed
-            self.task_metadata[task_id]['status'] = 'failed'
-            self.task_metadata[task_id]['error'] = str(e)
-            self.task_failed.emit(task_id, str(e))
+            meta.status = 'failed'
+            meta.error = str(e)
+            self._report_failure(task_id, str(e))
             
         finally:
             # Clean up
             if task_id in self.active_tasks:
                 del self.active_tasks[task_id]
                 
-    def submit_task(self, func: Callable, *args, **kwargs) -> str:
+    def _queue_completion(self, task_id: str, result: Any):
+        """Report a completion, buffering it when batching is enabled."""
+        if not self.batch_completions:
+            self.task_completed.emit(task_id, result)
+            return
+            
+        # The first completion in a window schedules the flush
+        if not self._completion_buf:
+            self.loop.call_later(self.COMPLETION_BATCH_MS / 1000, self._flush_completions)
+        self._completion_buf.append((task_id, result))
+        
+    def _flush_completions(self):
+        """Emit the completions buffered during the last window as one batch."""
+        completed, self._completion_buf = self._completion_buf, []
+        if completed:
+            self.tasks_completed.emit(completed)
+            
+    def _report_failure(self, task_id: str, error_message: str):
+        """Emit a failure after any buffered completions that preceded it."""
+        self._flush_completions()
+        self.task_failed.emit(task_id, error_message)
+            
+    def submit_task(self, func: Callable, *args, cpu_bound: bool = False, **kwargs) -> str:
         """
         Submit a task for asynchronous execution.
         
         Args:
             func: The function to execute
             *args, **kwargs: Arguments to pass to the function
+            cpu_bound: Run the function in a separate process instead of a
+                thread. The function and its arguments must be picklable,
+                i.e. module-level callables and plain data.
             
         Returns:
             task_id: A unique identifier for this task
         """
-        task_id = self._create_task_id()
-        
-        # Create task metadata
-        self.task_metadata[task_id] = {
-            'status': 'pending',
-            'submitted_time': time.time(),
-            'function': func.__name__,
-        }
+        task_id = self._register_task(func)
         
         # Create and store the task
-        task = asyncio.run_coroutine_threadsafe(
-            self._execute_task(task_id, func, *args, **kwargs), 
-            self.loop
-        )
+        executor = self._get_process_pool() if cpu_bound else None
+        coro = self._execute_task(task_id, func, *args, executor=executor, **kwargs)
+        if self._on_loop_thread():
+            task = self.loop.create_task(coro)
+        else:
+            task = asyncio.run_coroutine_threadsafe(coro, self.loop)
         
         self.active_tasks[task_id] = task
+        self._evict_metadata()
         return task_id
         
+    def submit_task_direct(self, func: Callable, *args, **kwargs) -> str:
+        """
+        Submit a short task straight to the thread pool.
+        
+        Skips the event loop round trip of submit_task; results are reported
+        through the same signals.
+        
+        Args:
+            func: The function to execute
+            *args, **kwargs: Arguments to pass to the function
+            
+        Returns:
+            task_id: A unique identifier for this task
+        """
+        task_id = self._register_task(func)
+        
+        meta = self.task_metadata[task_id]
+        future = self.thread_pool.submit(self._run_direct, meta, func, *args, **kwargs)
+        self.active_tasks[task_id] = future
+        future.add_done_callback(functools.partial(self._on_future_done, task_id))
+        
+        self._evict_metadata()
+        return task_id
+        
+    @staticmethod
+    def _run_direct(meta: TaskRecord, func: Callable, *args, **kwargs):
+        """Mark a direct task as running, then call it on the pool thread."""
+        meta.status = 'running'
+        return func(*args, **kwargs)
+        
+    def _on_future_done(self, task_id: str, future: concurrent.futures.Future):
+        """Report the outcome of a task submitted with submit_task_direct."""
+        # cancel_task has already updated the metadata
+        meta = self.task_metadata.get(task_id)
+        if meta is None or future.cancelled():
+            self.active_tasks.pop(task_id, None)
+            return
+            
+        # Update the record while the task is still active, so it can't be
+        # evicted and recycled for another task in between
+        error = future.exception()
+        if error is None:
+            meta.status = 'completed'
+        else:
+            meta.status = 'failed'
+            meta.error = str(error)
+        self.active_tasks.pop(task_id, None)
+        
+        if self.batch_completions:
+            # The completion buffer belongs to the loop thread
+            if error is None:
+                self.loop.call_soon_threadsafe(self._queue_completion, task_id, future.result())
+            else:
+                self.loop.call_soon_threadsafe(self._report_failure, task_id, str(error))
+        elif error is None:
+            self.task_completed.emit(task_id, future.result())
+        else:
+            self.task_failed.emit(task_id, str(error))
+        
     def cancel_task(self, task_id: str) -> bool:
         """
         Cancel a running task.
@@ -116,17 +375,19 @@ class AsyncTaskManager(QObject):
         Returns:
             bool: True if the task was cancelled, False otherwise
         """
-        if task_id in self.active_tasks:
-            # Try to cancel the future
-            cancelled = self.active_tasks[task_id].cancel()
+        future = self.active_tasks.get(task_id)
+        if future is None:
+            return False
             
-            if cancelled:
-                self.task_metadata[task_id]['status'] = 'cancelled'
-                del self.active_tasks[task_id]
-                
-            return cancelled
+        # Try to cancel the future
+        cancelled = future.cancel()
+        
+        if cancelled:
+            self.task_metadata[task_id].status = 'cancelled'
+            # A direct task's done-callback may already have removed it
+            self.active_tasks.pop(task_id, None)
             
-        return False
+        return cancelled
         
     def get_task_status(self, task_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -136,19 +397,51 @@ class AsyncTaskManager(QObject):
             task_id: The ID of the task
             
         Returns:
-            Dict containing task metadata or None if task not found
+            Dict containing a copy of the task metadata or None if task not found
         """
-        return self.task_metadata.get(task_id)
+        meta = self.task_metadata.get(task_id)
+        if meta is None:
+            return None
+            
+        self.task_metadata.move_to_end(task_id)
+        return meta.to_dict()
+        
+    def forget_task(self, task_id: str) -> bool:
+        """
+        Drop the metadata of a finished task.
+        
+        Args:
+            task_id: The ID of the task
+            
+        Returns:
+            bool: True if the metadata was dropped, False if the task is
+            unknown or still active
+        """
+        if task_id in self.active_tasks or task_id not in self.task_metadata:
+            return False
+            
+        self._release_metadata(self.task_metadata.pop(task_id))
+        return True
         
     def cleanup(self):
         """Clean up resources when the plugin is unloaded."""
         # Cancel all active tasks
-        for task_id in list(self.active_tasks.keys()):
-            self.cancel_task(task_id)
+        active_tasks, self.active_tasks = self.active_tasks, {}
+        for task_id, future in active_tasks.items():
+            if future.cancel():
+                meta = self.task_metadata.get(task_id)
+                if meta is not None:
+                    meta.status = 'cancelled'
             
-        # Shutdown thread pool
+        # Shutdown worker pools
         self.thread_pool.shutdown(wait=False)
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=False)
         
+        # A shared loop belongs to the host; only stop our own
+        if self.thread is None:
+            return
+            
         # Stop event loop
         self.loop.call_soon_threadsafe(self.loop.stop)
         
@@ -1,9 +1,14 @@
 # qgis_integration/event_dispatcher.py
 from typing import Any, Callable, Dict, List, Optional, Set, Tuple
-from qgis.PyQt.QtCore import QObject, pyqtSignal, pyqtSlot, QDateTime, Qt
-from qgis.core import QgsProject, QgsMapLayer, QgsWkbTypes, QgsProcessingException
+from qgis.PyQt.QtCore import QObject, pyqtSignal, pyqtSlot, QDateTime, QTimer, Qt
+from qgis.core import (QgsProject, QgsMapLayer, QgsWkbTypes, QgsProcessingException,
+                       QgsLayerTreeLayer)
+import functools
 import logging
-import traceback
+import sys
+import time
+from collections import deque
+from itertools import islice
 
 # Import QGIS processing
 try:
@@ -14,6 +19,25 @@ except ImportError:
     PROCESSING_AVAILABLE = False
     logging.warning("QGIS processing not available")
 
+# Human-readable names used in the command context
+_GEOMETRY_TYPE_NAMES = {
+    QgsWkbTypes.PointGeometry: "point",
+    QgsWkbTypes.LineGeometry: "line",
+    QgsWkbTypes.PolygonGeometry: "polygon",
+}
+_LAYER_TYPE_NAMES = {
+    QgsMapLayer.RasterLayer: "raster",
+}
+
+@functools.lru_cache(maxsize=64)
+def _iso_timestamp(second: int) -> str:
+    """Format an epoch second the way history timestamps are reported."""
+    return QDateTime.fromSecsSinceEpoch(second).toString(Qt.ISODate)
+
+def _now_ms() -> int:
+    """Current time in epoch milliseconds, as stored in history entries."""
+    return int(time.time() * 1000)
+
 class GISEventDispatcher(QObject):
     """
     Event dispatching system that links NLP results to QGIS actions.
@@ -28,6 +52,9 @@ class GISEventDispatcher(QObject):
     command_interpreted = pyqtSignal(object)  # Interpreted command structure
     command_executed = pyqtSignal(str, bool, str)  # command_id, success, message
     
+    # Default number of operation history entries kept in memory
+    HISTORY_MAX = 1024
+    
     def __init__(self, iface):
         """
         Initialize the event dispatcher.
@@ -39,64 +66,156 @@ class GISEventDispatcher(QObject):
         self.iface = iface
         self.logger = logging.getLogger('NLPGISPlugin.EventDispatcher')
         
+        # QgsProject is a singleton; keep the reference instead of re-fetching it
+        self.project = QgsProject.instance()
+        
         # Store mapping of command types to handler functions
         self.command_handlers = {}
         
-        # Operations history
-        self.operation_history = []
+        # Operations history; timestamps are epoch ms, formatted on read
+        self.max_history = self.HISTORY_MAX
+        self.operation_history = deque(maxlen=self.max_history)
+        
+        # Layer add/remove bursts (e.g. project loads) become one entry each
+        self._pending_added = []
+        self._pending_removed = []
+        self._pending_since = 0
+        self._layer_history_timer = QTimer()
+        self._layer_history_timer.setSingleShot(True)
+        self._layer_history_timer.setInterval(50)
+        self._layer_history_timer.timeout.connect(self._flush_layer_history)
+        
+        # Per-layer context info, rebuilt only when layers or the layer tree change
+        self._layers_cache = None
+        
+        # (exact name -> layer, casefolded name -> layer), rebuilt with the layer cache
+        self._layer_index = None
+        
+        # Full context, rebuilt when the layers change; the canvas, active
+        # layer and CRS parts are refreshed individually when marked stale
+        self._context_cache = None
+        self._stale_context = set()
         
         # Set up project connections
+        self._connections = []  # (signal, slot) pairs, disconnected in cleanup
+        self._connected = False
         self._connect_project_signals()
         
     def _connect_project_signals(self):
         """Connect to relevant QGIS project signals."""
-        project = QgsProject.instance()
-        
-        # Connect to layer-related signals
-        project.layersAdded.connect(self._on_layers_added)
-        project.layersRemoved.connect(self._on_layers_removed)
-        project.layersWillBeRemoved.connect(self._on_layers_will_be_removed)
-        
-        # Connect to project-related signals
-        project.readProject.connect(self._on_project_read)
-        project.writeProject.connect(self._on_project_write)
-        
+        if self._connected:
+            return
+            
+        project = self.project
+        root = project.layerTreeRoot()
+        self._connections = [
+            # Layer-related signals
+            (project.layersAdded, self._on_layers_added),
+            (project.layersRemoved, self._on_layers_removed),
+            (project.layersWillBeRemoved, self._on_layers_will_be_removed),
+            # Project-related signals
+            (project.readProject, self._on_project_read),
+            (project.writeProject, self._on_project_write),
+            # Layer visibility, renames and moves are reported through the layer tree
+            (root.visibilityChanged, self._invalidate_layers_cache),
+            (root.nameChanged, self._invalidate_layers_cache),
+            (root.addedChildren, self._invalidate_layers_cache),
+            (root.removedChildren, self._invalidate_layers_cache),
+            # The rest of the context follows the canvas, active layer and CRS
+            (project.crsChanged, functools.partial(self._mark_context_stale, 'crs')),
+            (self.iface.mapCanvas().extentsChanged,
+             functools.partial(self._mark_context_stale, 'canvas')),
+            (self.iface.currentLayerChanged,
+             functools.partial(self._mark_context_stale, 'selected_layer')),
+        ]
+        for signal, slot in self._connections:
+            signal.connect(slot)
+        self._connected = True
+        
+    def _invalidate_layers_cache(self, *args):
+        """Drop the cached layer info so the next context request rebuilds it."""
+        self._layers_cache = None
+        self._layer_index = None
+        self._context_cache = None
+        self._stale_context.clear()
+        
+    def _mark_context_stale(self, part: str, *args):
+        """Flag one part of the cached context ('canvas', 'selected_layer' or 'crs')."""
+        self._stale_context.add(part)
+        
+    def _queue_layer_history(self, pending: list, items):
+        """Add items to a pending layer history entry and (re)start the flush timer."""
+        if not (self._pending_added or self._pending_removed):
+            self._pending_since = _now_ms()
+        pending.extend(items)
+        self._layer_history_timer.start()
+        
+    def _flush_layer_history(self):
+        """Write the pending layer add/remove entries to the history."""
+        if self._pending_added:
+            self.operation_history.append({
+                'type': 'layers_added',
+                'layer_names': self._pending_added,
+                'timestamp': self._pending_since
+            })
+            self._pending_added = []
+        if self._pending_removed:
+            self.operation_history.append({
+                'type': 'layers_removed',
+                'layer_ids': self._pending_removed,
+                'timestamp': self._pending_since
+            })
+            self._pending_removed = []
+            
+    @pyqtSlot('QList<QgsMapLayer*>')
     def _on_layers_added(self, layers):
         """Handle layers being added to the project."""
-        layer_names = [layer.name() for layer in layers]
-        self.operation_history.append({
-            'type': 'layers_added',
-            'layer_names': layer_names,
-            'timestamp': QDateTime.currentDateTime().toString(Qt.ISODate)
-        })
+        self._invalidate_layers_cache()
+        self._queue_layer_history(self._pending_added, (layer.name() for layer in layers))
         
+    @pyqtSlot('QStringList')
     def _on_layers_removed(self, layer_ids):
         """Handle layers being removed from the project."""
-        self.operation_history.append({
-            'type': 'layers_removed',
-            'layer_ids': layer_ids,
-            'timestamp': QDateTime.currentDateTime().toString(Qt.ISODate)
-        })
+        self._invalidate_layers_cache()
+        self._queue_layer_history(self._pending_removed, layer_ids)
         
+    @pyqtSlot('QStringList')
     def _on_layers_will_be_removed(self, layer_ids):
         """Handle notification before layers are removed."""
         # Could be used for pre-removal actions if needed
         pass
         
+    @pyqtSlot()
     def _on_project_read(self):
         """Handle project being loaded."""
+        self._invalidate_layers_cache()
+        self._flush_layer_history()
         self.operation_history.append({
             'type': 'project_read',
-            'timestamp': QDateTime.currentDateTime().toString(Qt.ISODate)
+            'timestamp': _now_ms()
         })
         
+    @pyqtSlot()
     def _on_project_write(self):
         """Handle project being saved."""
+        self._flush_layer_history()
         self.operation_history.append({
             'type': 'project_write',
-            'timestamp': QDateTime.currentDateTime().toString(Qt.ISODate)
+            'timestamp': _now_ms()
         })
         
+    def connect_fast(self, slot: Callable):
+        """
+        Connect a slot to command_executed with a direct connection.
+        
+        The slot runs on whichever thread dispatched the command, so it must
+        be thread-safe and hand any GUI work back to the main thread itself.
+        
+        Args:
+            slot: Slot for command_executed(command_id, success, message)
+        """
+        self.command_executed.connect(slot, Qt.DirectConnection)
+        
     def register_command_handler(self, command_type: str, handler_func: Callable):
         """
         Register a handler function for a specific command type.
@@ -105,6 +224,8 @@ class GISEventDispatcher(QObject):
             command_type: Type of command (e.g., 'buffer', 'clip', etc.)
             handler_func: Function to call when this command is dispatched
         """
+        # Keys are stored lower-cased and interned, matching dispatch_command
+        command_type = sys.intern(command_type.lower())
         self.command_handlers[command_type] = handler_func
         self.logger.info(f"Registered handler for command type: {command_type}")
         
@@ -118,82 +239,161 @@ class GISEventDispatcher(QObject):
         Returns:
             Tuple of (success, message)
         """
-        # Get the operation type
-        operation = command.get('operation', '').lower()
+        # Get the operation type (parser output is already lower case)
+        operation = command.get('operation', '')
+        if not operation.islower():
+            operation = operation.lower()
         
-        # Emit signal for command received
-        self.command_interpreted.emit(command)
+        # Emit signal for command received (skipped when nothing listens)
+        if self.receivers(self.command_interpreted) > 0:
+            self.command_interpreted.emit(command)
         
         # Check if we have a handler for this operation
-        if operation in self.command_handlers:
-            try:
-                # Execute the handler
-                result = self.command_handlers[operation](command)
-                
-                # Record in operation history
-                self.operation_history.append({
-                    'type': 'nlp_command',
-                    'operation': operation,
-                    'command': command,
-                    'success': True,
-                    'timestamp': QDateTime.currentDateTime().toString(Qt.ISODate)
-                })
-                
-                # Emit success signal
-                command_id = f"{operation}_{QDateTime.currentDateTime().toString()}"
-                self.command_executed.emit(command_id, True, f"Successfully executed {operation} operation.")
-                
-                return True, f"Successfully executed {operation} operation."
-                
-            except Exception as e:
-                error_msg = f"Error executing {operation}: {str(e)}"
-                self.logger.error(error_msg)
-                self.logger.error(traceback.format_exc())
-                
-                # Record failure
-                self.operation_history.append({
-                    'type': 'nlp_command',
-                    'operation': operation,
-                    'command': command,
-                    'success': False,
-                    'error': str(e),
-                    'timestamp': QDateTime.currentDateTime().toString(Qt.ISODate)
-                })
-                
-                # Emit failure signal
-                command_id = f"{operation}_{QDateTime.currentDateTime().toString()}"
-                self.command_executed.emit(command_id, False, error_msg)
-                
-                return False, error_msg
-        else:
+        handler = self.command_handlers.get(operation)
+        if handler is None:
             error_msg = f"No handler registered for operation: {operation}"
             self.logger.warning(error_msg)
             return False, error_msg
             
+        timestamp = _now_ms()
+        try:
+            # Execute the handler
+            result = handler(command)
+            
+            # Record in operation history
+            self.operation_history.append({
+                'type': 'nlp_command',
+                'operation': operation,
+                'command': command,
+                'success': True,
+                'timestamp': timestamp
+            })
+            
+            # Emit success signal
+            message = f"Successfully executed {operation} operation."
+            if self.receivers(self.command_executed) > 0:
+                self.command_executed.emit(f"{operation}_{timestamp}", True, message)
+            
+            return True, message
+            
+        except Exception as e:
+            error_msg = f"Error executing {operation}: {str(e)}"
+            # exc_info defers traceback formatting to the log handlers
+            self.logger.error(error_msg, exc_info=True)
+            
+            # Record failure
+            self.operation_history.append({
+                'type': 'nlp_command',
+                'operation': operation,
+                'command': command,
+                'success': False,
+                'error': str(e),
+                'timestamp': timestamp
+            })
+            
+            # Emit failure signal
+            if self.receivers(self.command_executed) > 0:
+                self.command_executed.emit(f"{operation}_{timestamp}", False, error_msg)
+            
+            return False, error_msg
+            
+    def get_recent_history(self, count: int = 10) -> List[Dict[str, Any]]:
+        """
+        Get the most recent entries from the operation history.
+        
+        Args:
+            count: Maximum number of entries to return
+            
+        Returns:
+            List of history entries, oldest first, with ISO timestamps
+        """
+        self._flush_layer_history()
+        start = len(self.operation_history) - count if count > 0 else 0
+        return [
+            dict(entry, timestamp=_iso_timestamp(entry['timestamp'] // 1000))
+            for entry in islice(self.operation_history, max(start, 0), None)
+        ]
+        
     def get_current_context(self) -> Dict[str, Any]:
         """
         Get the current QGIS context information for command interpretation.
         
+        Returns:
+            Dictionary with current context information
+        """
+        if self._context_cache is None:
+            self._context_cache = self._build_context()
+        elif self._stale_context:
+            self._refresh_context(self._context_cache)
+        self._stale_context.clear()
+        context = self._context_cache
+        
+        # Copy the mutable parts so callers can't alter the cached context
+        return dict(
+            context,
+            active_layers=[dict(layer_info) for layer_info in context['active_layers']],
+            extent=dict(context['extent'])
+        )
+        
+    def _build_context(self) -> Dict[str, Any]:
+        """
+        Collect the context information from QGIS.
+        
         Returns:
             Dictionary with current context information
         """
         # Get current project
-        project = QgsProject.instance()
+        project = self.project
+        
+        # Get current layers (cached until layers or their visibility change)
+        if self._layers_cache is None:
+            # One walk of the layer tree gives each layer with its visibility
+            describe = self._describe_layer
+            self._layers_cache = [
+                info for info in (
+                    describe(node) for node in project.layerTreeRoot().findLayers()
+                )
+                if info is not None
+            ]
+        layers = self._layers_cache
         
-        # Get current layers
-        layers = []
-        for layer_id, layer in project.mapLayers().items():
-            try:
-                layers.append({
-                    'id': layer_id,
-                    'name': layer.name(),
-                    'type': self._get_layer_type(layer),
-                    'visible': self.iface.layerTreeView().isLayerVisible(layer) if self.iface.layerTreeView() else True
-                })
-            except Exception as e:
-                self.logger.warning(f"Error getting layer info for {layer_id}: {str(e)}")
+        # Gather context information
+        context = {
+            'active_layers': layers,
+            'selected_layer': self._selected_layer_name(),
+            'crs': self._project_crs(),
+        }
+        context.update(self._canvas_context())
+        
+        return context
         
-        # Get current canvas extent
+    def _refresh_context(self, context: Dict[str, Any]):
+        """
+        Re-read the parts of a cached context that were marked stale.
+        
+        Args:
+            context: Cached context dictionary, updated in place
+        """
+        stale = self._stale_context
+        if 'selected_layer' in stale:
+            context['selected_layer'] = self._selected_layer_name()
+        if 'crs' in stale:
+            context['crs'] = self._project_crs()
+        if 'canvas' in stale:
+            context.update(self._canvas_context())
+            
+    def _selected_layer_name(self) -> Optional[str]:
+        """Get the name of the active layer, if any."""
+        layer = self.iface.activeLayer()
+        return layer.name() if layer else None
+        
+    def _project_crs(self) -> str:
+        """Get the project CRS auth ID, defaulting to EPSG:4326."""
+        crs = self.project.crs()
+        return crs.authid() if crs.isValid() else 'EPSG:4326'
+        
+    def _canvas_context(self) -> Dict[str, Any]:
+        """Get the current canvas extent and scale."""
         try:
             canvas = self.iface.mapCanvas()
             extent = canvas.extent()
@@ -209,18 +409,35 @@ class GISEventDispatcher(QObject):
             self.logger.warning(f"Error getting canvas info: {str(e)}")
             extent_dict = {'xmin': 0, 'ymin': 0, 'xmax': 1, 'ymax': 1}
             scale = 1
-        
-        # Gather context information
-        context = {
-            'active_layers': layers,
-            'selected_layer': self.iface.activeLayer().name() if self.iface.activeLayer() else None,
-            'crs': project.crs().authid() if project.crs().isValid() else 'EPSG:4326',
-            'extent': extent_dict,
-            'scale': scale
-        }
-        
-        return context
+            
+        return {'extent': extent_dict, 'scale': scale}
     
+    def _describe_layer(self, node: QgsLayerTreeLayer) -> Optional[Dict[str, Any]]:
+        """
+        Get the context info for a single layer.
+        
+        Args:
+            node: Layer tree node of the layer
+            
+        Returns:
+            Layer info dictionary or None if the layer could not be read
+        """
+        layer_id = node.layerId()
+        try:
+            layer = node.layer()
+            if layer is None:
+                return None
+                
+            return {
+                'id': layer_id,
+                'name': layer.name(),
+                'type': self._get_layer_type(layer),
+                'visible': node.isVisible()
+            }
+        except Exception as e:
+            self.logger.warning(f"Error getting layer info for {layer_id}: {str(e)}")
+            return None
+            
     def _get_layer_type(self, layer: QgsMapLayer) -> str:
         """
         Get a human-readable layer type.
@@ -232,20 +449,10 @@ class GISEventDispatcher(QObject):
             Layer type as string
         """
         try:
-            if layer.type() == QgsMapLayer.VectorLayer:
-                geom_type = layer.geometryType()
-                if geom_type == QgsWkbTypes.PointGeometry:
-                    return "point"
-                elif geom_type == QgsWkbTypes.LineGeometry:
-                    return "line"
-                elif geom_type == QgsWkbTypes.PolygonGeometry:
-                    return "polygon"
-                else:
-                    return "vector"
-            elif layer.type() == QgsMapLayer.RasterLayer:
-                return "raster"
-            else:
-                return "unknown"
+            layer_type = layer.type()
+            if layer_type == QgsMapLayer.VectorLayer:
+                return _GEOMETRY_TYPE_NAMES.get(layer.geometryType(), "vector")
+            return _LAYER_TYPE_NAMES.get(layer_type, "unknown")
         except Exception as e:
             self.logger.warning(f"Error determining layer type: {str(e)}")
             return "unknown"
@@ -264,20 +471,14 @@ class GISEventDispatcher(QObject):
         if not PROCESSING_AVAILABLE:
             return False, "QGIS processing framework not available", None
             
+        handler = self._OP_TABLE.get(operation)
+        if handler is None:
+            return False, f"Operation {operation} not implemented", None
+            
         try:
-            if operation == 'buffer':
-                return self._execute_buffer_operation(**params)
-            elif operation == 'clip':
-                return self._execute_clip_operation(**params)
-            elif operation == 'select':
-                return self._execute_select_operation(**params)
-            elif operation == 'intersection':
-                return self._execute_intersection_operation(**params)
-            else:
-                return False, f"Operation {operation} not implemented", None
+            return handler(self, **params)
         except Exception as e:
-            self.logger.error(f"Error in {operation}: {str(e)}")
-            self.logger.error(traceback.format_exc())
+            self.logger.error(f"Error in {operation}: {str(e)}", exc_info=True)
             return False, f"Error in {operation}: {str(e)}", None
             
     def _execute_buffer_operation(self, input_layer, distance, **kwargs):
@@ -307,7 +508,7 @@ class GISEventDispatcher(QObject):
             if 'OUTPUT' in result:
                 output_layer = result['OUTPUT']
                 output_layer.setName(f"{input_layer}_buffer_{distance}m")
-                QgsProject.instance().addMapLayer(output_layer)
+                self.project.addMapLayer(output_layer)
                 
                 return True, f"Buffer created successfully for {input_layer}", output_layer
             else:
@@ -344,7 +545,7 @@ class GISEventDispatcher(QObject):
             if 'OUTPUT' in result:
                 output_layer = result['OUTPUT']
                 output_layer.setName(f"{input_layer}_clipped_by_{overlay_layer}")
-                QgsProject.instance().addMapLayer(output_layer)
+                self.project.addMapLayer(output_layer)
                 
                 return True, f"Clip operation completed successfully", output_layer
             else:
@@ -365,8 +566,12 @@ class GISEventDispatcher(QObject):
                 
             # Perform selection
             layer.selectByExpression(expression)
-            selected_count = layer.selectedFeatureCount()
             
+            # Counting walks the selection, so only do it when asked
+            if not kwargs.get('return_count', True):
+                return True, f"Selected features from {input_layer}", -1
+                
+            selected_count = layer.selectedFeatureCount()
             return True, f"Selected {selected_count} features from {input_layer}", selected_count
             
         except Exception as e:
@@ -400,7 +605,7 @@ class GISEventDispatcher(QObject):
             if 'OUTPUT' in result:
                 output_layer = result['OUTPUT']
                 output_layer.setName(f"{input_layer}_intersect_{overlay_layer}")
-                QgsProject.instance().addMapLayer(output_layer)
+                self.project.addMapLayer(output_layer)
                 
                 return True, f"Intersection operation completed successfully", output_layer
             else:
@@ -410,6 +615,14 @@ class GISEventDispatcher(QObject):
             return False, f"Processing error: {str(e)}", None
         except Exception as e:
             return False, f"Unexpected error in intersection operation: {str(e)}", None
+            
+    # Map of GIS operation names to their implementations (called with self)
+    _OP_TABLE = {
+        'buffer': _execute_buffer_operation,
+        'clip': _execute_clip_operation,
+        'select': _execute_select_operation,
+        'intersection': _execute_intersection_operation,
+    }
     
     def _get_layer_by_name(self, layer_name: str):
         """
@@ -421,40 +634,66 @@ class GISEventDispatcher(QObject):
         Returns:
             QgsMapLayer or None if not found
         """
-        project = QgsProject.instance()
+        if self._layer_index is None:
+            self._layer_index = self._build_layer_index()
+        by_name, by_folded_name = self._layer_index
         
         # Try exact match first
-        for layer in project.mapLayers().values():
-            if layer.name() == layer_name:
-                return layer
-                
+        layer = by_name.get(layer_name)
+        if layer is not None:
+            return layer
+            
         # Try case-insensitive match
-        for layer in project.mapLayers().values():
-            if layer.name().lower() == layer_name.lower():
-                return layer
-                
+        wanted = layer_name.casefold()
+        layer = by_folded_name.get(wanted)
+        if layer is not None:
+            return layer
+            
         # Try partial match
-        for layer in project.mapLayers().values():
-            if layer_name.lower() in layer.name().lower():
+        for name, layer in by_folded_name.items():
+            if wanted in name:
                 return layer
                 
         return None
         
-    def cleanup(self):
-        """Clean up resources when the plugin is unloaded."""
-        # Remove connections to QGIS signals
-        project = QgsProject.instance()
+    def _build_layer_index(self) -> Tuple[Dict[str, QgsMapLayer], Dict[str, QgsMapLayer]]:
+        """
+        Index the project layers by name and by casefolded name.
         
-        try:
-            project.layersAdded.disconnect(self._on_layers_added)
-            project.layersRemoved.disconnect(self._on_layers_removed)
-            project.layersWillBeRemoved.disconnect(self._on_layers_will_be_removed)
-            project.readProject.disconnect(self._on_project_read)
-            project.writeProject.disconnect(self._on_project_write)
-        except Exception as e:
-            # Connections might already be removed
-            self.logger.warning(f"Error disconnecting signals: {str(e)}")
+        Returns:
+            Tuple of (name -> layer, casefolded name -> layer); the first
+            layer with a given name wins, as in project order
+        """
+        by_name = {}
+        by_folded_name = {}
+        for layer in self.project.mapLayers().values():
+            name = layer.name()
+            by_name.setdefault(name, layer)
+            by_folded_name.setdefault(name.casefold(), layer)
+        return by_name, by_folded_name
         
-        # Clear handler registrations
-        self.command_handlers.clear()
-        self.operation_history.clear()
\ No newline at end of file
+    def cleanup(self):
+        """Clean up resources when the plugin is unloaded."""
+        if not self._connected:
+            return
+            
+        # Remove only our own connections; these objects are shared with QGIS
+        for signal, slot in self._connections:
+            try:
+                signal.disconnect(slot)
+            except Exception as e:
+                # Connections might already be removed
+                self.logger.warning(f"Error disconnecting signals: {str(e)}")
+        self._connections = []
+        self._connected = False
+        
+        # Release handler registrations and cached state
+        self._layer_history_timer.stop()
+        self._pending_added = []
+        self._pending_removed = []
+        self.command_handlers = {}
+        self.operation_history = deque(maxlen=self.max_history)
+        self._layers_cache = None
+        self._layer_index = None
+        self._context_cache = None
+        self._stale_context.clear()
\ No newline at end of file
@@ -2,10 +2,57 @@
 import gc
 import os
 import psutil
+import select
+import sys
+import threading
 import time
 import logging
 from typing import Dict, List, Optional, Set, Tuple, Any
 import weakref
+from collections import OrderedDict
+
+def _estimate_size(obj: Any) -> int:
+    """
+    Estimate the memory held by an object for cache accounting.
+    
+    Args:
+        obj: Object to measure
+        
+    Returns:
+        Estimated size in bytes
+    """
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return len(obj)
+        
+    # NumPy arrays and similar buffers report their payload directly
+    nbytes = getattr(obj, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return nbytes
+        
+    # pandas objects
+    memory_usage = getattr(obj, 'memory_usage', None)
+    if callable(memory_usage):
+        try:
+            return int(memory_usage(deep=True).sum())
+        except Exception:
+            pass
+            
+    return sys.getsizeof(obj)
+
+# Marks a cache miss, since None is a valid cached value
+_MISSING = object()
+
+def _pressure_files():
+    """Yield candidate PSI memory pressure files, most specific first."""
+    try:
+        with open('/proc/self/cgroup') as f:
+            for line in f:
+                # cgroup v2 entries look like "0::/user.slice/..."
+                if line.startswith('0::'):
+                    yield f"/sys/fs/cgroup{line[3:].strip().rstrip('/')}/memory.pressure"
+    except OSError:
+        pass
+    yield '/proc/pressure/memory'
 
 class MemoryManager:
     """
@@ -15,6 +62,16 @@ class MemoryManager:
     crashes and performance degradation in QGIS during NLP processing.
     """
     
+    # How long an RSS reading is reused before /proc is read again
+    RSS_CACHE_SECONDS = 0.1
+    
+    # PSI trigger: notify when tasks stall on memory for 150 ms within a 2 s
+    # window (the smallest window allowed for unprivileged processes)
+    PSI_TRIGGER = b"some 150000 2000000\0"
+    
+    # A trigger event counts as critical for one trigger window
+    PSI_WINDOW_SECONDS = 2.0
+    
     def __init__(self, warning_threshold_mb: int = 1000, critical_threshold_mb: int = 1500):
         """
         Initialize the memory manager.
@@ -27,8 +84,8 @@ class MemoryManager:
         self.critical_threshold = critical_threshold_mb * 1024 * 1024  # Convert to bytes
         
         # Initialize cache tracking
-        self.caches = {}  # name -> (size estimate, last_accessed, data)
-        self.cache_access_history = {}  # name -> [list of access timestamps]
+        self.caches = OrderedDict()  # name -> data, least recently used first
+        self._cache_sizes = {}  # name -> size estimate in bytes
         
         # Setup logging
         self.logger = logging.getLogger("NLPGISPlugin.MemoryManager")
@@ -36,6 +93,53 @@ class MemoryManager:
         # Cache for tracking objects
         self._tracked_objects = weakref.WeakValueDictionary()
         
+        # Process handle and last RSS reading (monotonic time, bytes)
+        self._process = psutil.Process(os.getpid())
+        self._rss_cache = (float('-inf'), 0)
+        
+        # Kernel memory pressure notifications (Linux PSI), if available
+        self._pressure_at = float('-inf')  # monotonic time of the last PSI event
+        self._pressure_fd = None
+        self._pressure_stop = threading.Event()
+        self._pressure_thread = None
+        self._start_pressure_monitor()
+        
+    def _start_pressure_monitor(self):
+        """Arm a PSI memory pressure trigger and watch it in a background thread."""
+        if not sys.platform.startswith('linux'):
+            return
+            
+        for path in _pressure_files():
+            try:
+                fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+            except OSError:
+                continue
+            try:
+                os.write(fd, self.PSI_TRIGGER)
+            except OSError:
+                os.close(fd)
+                continue
+                
+            self._pressure_fd = fd
+            self._pressure_thread = threading.Thread(
+                target=self._watch_pressure, name="nlp-memory-pressure", daemon=True
+            )
+            self._pressure_thread.start()
+            self.logger.debug(f"Watching memory pressure via {path}")
+            return
+            
+    def _watch_pressure(self):
+        """Record the time whenever the kernel fires the PSI trigger."""
+        poller = select.poll()
+        poller.register(self._pressure_fd, select.POLLPRI)
+        while not self._pressure_stop.is_set():
+            for _, event in poller.poll(1000):
+                if event & select.POLLERR:
+                    # The monitored cgroup went away
+                    return
+                if event & select.POLLPRI:
+                    self._pressure_at = time.monotonic()
+        
     def get_current_memory_usage(self) -> int:
         """
         Get the current memory usage of the process in bytes.
@@ -43,8 +147,16 @@ class MemoryManager:
         Returns:
             Current memory usage in bytes
         """
-        process = psutil.Process(os.getpid())
-        return process.memory_info().rss
+        now = time.monotonic()
+        read_at, rss = self._rss_cache
+        if now - read_at > self.RSS_CACHE_SECONDS:
+            rss = self._process.memory_info().rss
+            self._rss_cache = (now, rss)
+        return rss
+        
+    def invalidate_rss_cache(self):
+        """Force the next memory usage query to read a fresh value."""
+        self._rss_cache = (float('-inf'), 0)
         
     def get_memory_status(self) -> Dict[str, Any]:
         """
@@ -61,7 +173,7 @@ class MemoryManager:
             'critical_threshold_mb': self.critical_threshold / (1024 * 1024),
             'status': self._get_status_level(current_usage),
             'cache_count': len(self.caches),
-            'total_cache_size_estimate_mb': sum(size for size, _, _ in self.caches.values()) / (1024 * 1024)
+            'total_cache_size_estimate_mb': sum(self._cache_sizes.values()) / (1024 * 1024)
         }
         
     def _get_status_level(self, usage: int) -> str:
@@ -88,6 +200,8 @@ class MemoryManager:
         Returns:
             True if memory usage is critical, False otherwise
         """
+        if time.monotonic() - self._pressure_at <= self.PSI_WINDOW_SECONDS:
+            return True
         return self.get_current_memory_usage() >= self.critical_threshold
         
     def is_memory_warning(self) -> bool:
@@ -111,16 +225,6 @@ class MemoryManager:
         Returns:
             True if data was cached, False if rejected due to memory constraints
         """
-        # Update access history
-        now = time.time()
-        if name not in self.cache_access_history:
-            self.cache_access_history[name] = []
-        self.cache_access_history[name].append(now)
-        
-        # Trim history to last 10 accesses
-        if len(self.cache_access_history[name]) > 10:
-            self.cache_access_history[name] = self.cache_access_history[name][-10:]
-        
         # Check if we're already at critical memory levels
         if self.is_memory_critical():
             self.free_memory(aggressive=True)
@@ -129,17 +233,12 @@ class MemoryManager:
         
         # Guess the size if not provided
         if size_estimate is None:
-            # This is a very rough estimate
-            size_estimate = sys.getsizeof(data)
-            if hasattr(data, '__len__'):
-                try:
-                    # Adjust for container objects
-                    size_estimate += len(data) * 8  # Rough approximation
-                except:
-                    pass
-        
-        # Cache the data with metadata
-        self.caches[name] = (size_estimate, now, data)
+            size_estimate = _estimate_size(data)
+        
+        # Cache the data with metadata, as the most recently used entry
+        self.caches[name] = data
+        self.caches.move_to_end(name)
+        self._cache_sizes[name] = size_estimate
         
         # If we hit warning threshold after caching, do some cleanup
         if self.is_memory_warning():
@@ -157,16 +256,13 @@ class MemoryManager:
         Returns:
             The cached data or None if not found
         """
-        if name in self.caches:
-            size, _, data = self.caches[name]
-            # Update the access time
-            self.caches[name] = (size, time.time(), data)
-            # Also update access history
-            if name not in self.cache_access_history:
-                self.cache_access_history[name] = []
-            self.cache_access_history[name].append(time.time())
-            return data
-        return None
+        data = self.caches.get(name, _MISSING)
+        if data is _MISSING:
+            return None
+            
+        # Update the LRU position
+        self.caches.move_to_end(name)
+        return data
         
     def clear_cache(self, name: Optional[str] = None):
         """
@@ -176,13 +272,11 @@ class MemoryManager:
             name: Name of cache to clear, or None for all
         """
         if name is not None:
-            if name in self.caches:
-                del self.caches[name]
-                if name in self.cache_access_history:
-                    del self.cache_access_history[name]
+            self.caches.pop(name, None)
+            self._cache_sizes.pop(name, None)
         else:
             self.caches.clear()
-            self.cache_access_history.clear()
+            self._cache_sizes.clear()
             
     def free_memory(self, aggressive: bool = False) -> int:
         """
@@ -194,28 +288,36 @@ class MemoryManager:
         Returns:
             Estimated amount of memory freed in bytes
         """
+        self._pressure_at = float('-inf')
+        self.invalidate_rss_cache()
         memory_before = self.get_current_memory_usage()
         freed_estimate = 0
         
         # First approach: Clear least recently used caches
         if self.caches:
-            # Sort caches by access time
-            sorted_caches = sorted(
-                self.caches.items(),
-                key=lambda x: x[1][1]  # Sort by last access time
-            )
-            
             # Clear either the oldest 25% or 50% depending on aggressiveness
-            clear_count = max(1, len(sorted_caches) // (2 if aggressive else 4))
-            for i in range(clear_count):
-                name, (size, _, _) = sorted_caches[i]
-                self.clear_cache(name)
-                freed_estimate += size
-        
-        # Run garbage collection
-        gc.collect()
+            clear_count = max(1, len(self.caches) // (2 if aggressive else 4))
+            
+            # Keep automatic collections from firing while entries are released
+            gc_was_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                for _ in range(clear_count):
+                    name, _ = self.caches.popitem(last=False)
+                    freed_estimate += self._cache_sizes.pop(name)
+            finally:
+                if gc_was_enabled:
+                    gc.enable()
+        
+        # Run garbage collection: a full sweep only when aggressive; routine
+        # cleanups collect the young generations, and only if they have grown
+        if aggressive:
+            gc.collect(2)
+        elif gc.get_count()[0] >= gc.get_threshold()[0] // 2:
+            gc.collect(1)
         
         # Calculate actual memory freed
+        self.invalidate_rss_cache()
         memory_after = self.get_current_memory_usage()
         memory_freed = max(0, memory_before - memory_after)
         
@@ -245,6 +347,15 @@ class MemoryManager:
         
     def cleanup(self):
         """Perform cleanup when the plugin is unloaded."""
+        # Stop watching memory pressure
+        if self._pressure_thread is not None:
+            self._pressure_stop.set()
+            self._pressure_thread.join(timeout=2.0)
+            self._pressure_thread = None
+        if self._pressure_fd is not None:
+            os.close(self._pressure_fd)
+            self._pressure_fd = None
+            
         # Clear all caches
         self.clear_cache()
         